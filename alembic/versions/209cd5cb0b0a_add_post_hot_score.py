@@ -0,0 +1,55 @@
+"""add post hot score
+
+Revision ID: 209cd5cb0b0a
+Revises: 3c0b8c467a89
+Create Date: 2026-10-18 19:46:46.447079
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '209cd5cb0b0a'
+down_revision: Union[str, Sequence[str], None] = '3c0b8c467a89'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows scored per transaction by the backfill
+BATCH = 10000
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Built so that post stays writable throughout: the constant default adds the column
+    without rewriting the table, existing rows are scored in id-ordered batches, each
+    committed on its own, and both indexes are built CONCURRENTLY. If an index build
+    fails, drop the INVALID index before re-running the upgrade.
+    """
+    op.add_column('post', sa.Column('hot_score', sa.Float(), server_default=sa.text('0'), nullable=False))
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text("SELECT max(id) FROM post")).scalar() or 0
+        # Initial scores with the default HOT_GRAVITY / HOT_COMMENT_WEIGHT; the re-decay job takes over from here
+        for start in range(0, last_id, BATCH):
+            bind.execute(sa.text("""
+                UPDATE post SET hot_score = (votes_count + 2.0 * comments_count + 1)
+                    / power(greatest(extract(epoch FROM now() - created_at) / 3600, 0) + 2, 1.8)
+                WHERE id > :start AND id <= :end
+            """), {"start": start, "end": start + BATCH})
+        op.create_index('ix_post_created_at', 'post', ['created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_post_hot_score', 'post', ['hot_score', 'id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_hot_score', table_name='post', postgresql_concurrently=True)
+        op.drop_index('ix_post_created_at', table_name='post', postgresql_concurrently=True)
+    op.drop_column('post', 'hot_score')
@@ -0,0 +1,37 @@
+"""add followers created_at indexes
+
+Revision ID: 3c0b8c467a89
+Revises: c6bd6625a537
+Create Date: 2026-10-18 20:31:05.672910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c0b8c467a89'
+down_revision: Union[str, Sequence[str], None] = 'c6bd6625a537'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Built CONCURRENTLY so follows and unfollows keep working; if a build fails, drop the
+    INVALID index before re-running the upgrade.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index('ix_followers_followed_id_created_at', 'followers', ['followed_id', 'created_at', 'follower_id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_followers_follower_id_created_at', 'followers', ['follower_id', 'created_at', 'followed_id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_followers_follower_id_created_at', table_name='followers', postgresql_concurrently=True)
+        op.drop_index('ix_followers_followed_id_created_at', table_name='followers', postgresql_concurrently=True)
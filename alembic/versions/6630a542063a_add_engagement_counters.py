@@ -0,0 +1,73 @@
+"""add engagement counters
+
+Revision ID: 6630a542063a
+Revises: 2066c6ddb050
+Create Date: 2026-10-18 09:12:44.104512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6630a542063a'
+down_revision: Union[str, Sequence[str], None] = '2066c6ddb050'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows updated per transaction by the backfill
+BATCH = 10000
+
+
+def _backfill(bind, table: str, column: str, counts: str):
+    """Set table.column from counts (rows of id, n), committing BATCH ids at a time.
+
+    The counts are grouped once into a temporary table, so the source table is read once
+    and each batch only locks its own range of rows.
+    """
+    bind.execute(sa.text(f"CREATE TEMPORARY TABLE backfill AS {counts}"))
+    bind.execute(sa.text("ALTER TABLE backfill ADD PRIMARY KEY (id)"))
+    last_id = bind.execute(sa.text("SELECT max(id) FROM backfill")).scalar() or 0
+    for start in range(0, last_id, BATCH):
+        bind.execute(sa.text(f"""
+            UPDATE {table} SET {column} = b.n FROM backfill b
+            WHERE {table}.id = b.id AND b.id > :start AND b.id <= :end
+        """), {"start": start, "end": start + BATCH})
+    bind.execute(sa.text("DROP TABLE backfill"))
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The constant defaults add the columns without rewriting the tables, and the counts
+    are filled in committed batches, so post and users stay writable. Writes made while
+    it runs are not counted; run ``python -m app.utils.counters`` once the new code is
+    serving.
+    """
+    op.add_column('post', sa.Column('votes_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('post', sa.Column('comments_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('users', sa.Column('followers_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('users', sa.Column('following_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('users', sa.Column('posts_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        _backfill(bind, "post", "votes_count", "SELECT post_id AS id, count(*) AS n FROM votes GROUP BY post_id")
+        _backfill(bind, "post", "comments_count", "SELECT post_id AS id, count(*) AS n FROM comments GROUP BY post_id")
+        _backfill(bind, "users", "followers_count",
+                  "SELECT followed_id AS id, count(*) AS n FROM followers GROUP BY followed_id")
+        _backfill(bind, "users", "following_count",
+                  "SELECT follower_id AS id, count(*) AS n FROM followers GROUP BY follower_id")
+        _backfill(bind, "users", "posts_count", "SELECT user_id AS id, count(*) AS n FROM post GROUP BY user_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'posts_count')
+    op.drop_column('users', 'following_count')
+    op.drop_column('users', 'followers_count')
+    op.drop_column('post', 'comments_count')
+    op.drop_column('post', 'votes_count')
@@ -0,0 +1,72 @@
+"""add post search vector
+
+Revision ID: 66fad84f3dc3
+Revises: b510182f7905
+Create Date: 2026-10-18 12:03:55.918274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66fad84f3dc3'
+down_revision: Union[str, Sequence[str], None] = 'b510182f7905'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows filled per transaction by the backfill
+BATCH = 10000
+
+DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Built so that post stays writable throughout. The column is nullable with no default,
+    so adding it does not rewrite the table. A trigger fills it for new and edited posts,
+    and existing rows are filled in id-ordered batches, each committed on its own.
+    The GIN index is then built CONCURRENTLY; if that fails, drop the INVALID
+    ix_post_search_vector before re-running the upgrade.
+    """
+    op.add_column('post', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION post_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {DOCUMENT.format(row="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER post_search_vector BEFORE INSERT OR UPDATE OF title, content ON post "
+        "FOR EACH ROW EXECUTE FUNCTION post_search_vector_update()"
+    )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text("SELECT max(id) FROM post")).scalar() or 0
+        for start in range(0, last_id, BATCH):
+            bind.execute(sa.text(f"""
+                UPDATE post SET search_vector = {DOCUMENT.format(row="")}
+                WHERE id > :start AND id <= :end AND search_vector IS NULL
+            """), {"start": start, "end": start + BATCH})
+        op.create_index('ix_post_search_vector', 'post', ['search_vector'], unique=False,
+                        postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_post_search_vector', table_name='post', postgresql_using='gin',
+                      postgresql_concurrently=True)
+    op.execute("DROP TRIGGER post_search_vector ON post")
+    op.execute("DROP FUNCTION post_search_vector_update()")
+    op.drop_column('post', 'search_vector')
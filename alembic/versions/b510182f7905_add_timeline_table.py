@@ -0,0 +1,57 @@
+"""add timeline table
+
+Revision ID: b510182f7905
+Revises: 6630a542063a
+Create Date: 2026-10-18 10:41:07.553120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b510182f7905'
+down_revision: Union[str, Sequence[str], None] = '6630a542063a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('timeline',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    op.create_index('ix_timeline_user_id_created_at', 'timeline', ['user_id', 'created_at', 'post_id'], unique=False)
+
+    # Materialize existing follow edges with the same cap as timeline.backfill: each edge gets
+    # the author's FEED_BACKFILL_POSTS newest posts. High-follower authors stay read-time merged
+    op.execute(sa.text("""
+        INSERT INTO timeline (user_id, post_id, author_id, created_at)
+        SELECT f.follower_id, p.id, p.user_id, p.created_at
+        FROM followers f
+        JOIN users u ON u.id = f.followed_id
+        CROSS JOIN LATERAL (
+            SELECT id, user_id, created_at FROM post
+            WHERE post.user_id = f.followed_id
+            ORDER BY created_at DESC, id DESC
+            LIMIT :posts
+        ) p
+        WHERE u.followers_count < :threshold
+    """).bindparams(threshold=settings.FEED_FANOUT_THRESHOLD, posts=settings.FEED_BACKFILL_POSTS))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_timeline_user_id_created_at', table_name='timeline')
+    op.drop_table('timeline')
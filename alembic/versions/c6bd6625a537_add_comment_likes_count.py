@@ -0,0 +1,57 @@
+"""add comment likes count
+
+Revision ID: c6bd6625a537
+Revises: 6eb72f2101ae
+Create Date: 2026-10-18 19:52:40.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6bd6625a537'
+down_revision: Union[str, Sequence[str], None] = '6eb72f2101ae'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Rows updated per transaction by the backfill
+BATCH = 10000
+
+
+def _backfill(bind, table: str, column: str, counts: str):
+    """Set table.column from counts (rows of id, n), committing BATCH ids at a time.
+
+    The counts are grouped once into a temporary table, so the source table is read once
+    and each batch only locks its own range of rows.
+    """
+    bind.execute(sa.text(f"CREATE TEMPORARY TABLE backfill AS {counts}"))
+    bind.execute(sa.text("ALTER TABLE backfill ADD PRIMARY KEY (id)"))
+    last_id = bind.execute(sa.text("SELECT max(id) FROM backfill")).scalar() or 0
+    for start in range(0, last_id, BATCH):
+        bind.execute(sa.text(f"""
+            UPDATE {table} SET {column} = b.n FROM backfill b
+            WHERE {table}.id = b.id AND b.id > :start AND b.id <= :end
+        """), {"start": start, "end": start + BATCH})
+    bind.execute(sa.text("DROP TABLE backfill"))
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The constant default adds the column without rewriting comments, and the counts are
+    filled in committed batches. Writes made while it runs are not counted; run
+    ``python -m app.utils.counters`` once the new code is serving.
+    """
+    op.add_column('comments', sa.Column('likes_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    with op.get_context().autocommit_block():
+        _backfill(op.get_bind(), "comments", "likes_count",
+                  "SELECT comment_id AS id, count(*) AS n FROM comment_likes GROUP BY comment_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('comments', 'likes_count')
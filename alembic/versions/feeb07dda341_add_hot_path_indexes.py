@@ -0,0 +1,43 @@
+"""add hot path indexes
+
+Revision ID: feeb07dda341
+Revises: 209cd5cb0b0a
+Create Date: 2026-10-18 19:48:27.677136
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'feeb07dda341'
+down_revision: Union[str, Sequence[str], None] = '209cd5cb0b0a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY builds without blocking writes but cannot run inside a
+# transaction, hence the autocommit blocks. If a build fails it leaves an INVALID index
+# behind; drop it before re-running the upgrade.
+INDEXES = (
+    ('ix_comment_likes_comment_id', 'comment_likes', ['comment_id']),
+    ('ix_comments_parent_id_created_at', 'comments', ['parent_id', 'created_at', 'id']),
+    ('ix_comments_post_id_created_at', 'comments', ['post_id', 'created_at', 'id']),
+    ('ix_post_user_id_created_at', 'post', ['user_id', 'created_at', 'id']),
+    ('ix_votes_post_id', 'votes', ['post_id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
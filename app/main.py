@@ -1,20 +1,53 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from .models import models
 from fastapi.middleware.cors import CORSMiddleware
-from app.utils.database import engine
-from .routers import post, user, auth, vote, profile, follow, feed
+from app.utils.config import settings
+from app.utils import hashing, vote_buffer, ranking, query_stats, metrics, replicas, notifications
+from app.utils.database import engine, warm_up_pool
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from .routers import post, user, auth, vote, profile, follow, feed, health, notification, metrics as metrics_router
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # No DDL here: the schema is owned by Alembic (see README)
+    await warm_up_pool(settings.DB_POOL_WARMUP, settings.DB_WARMUP_TIMEOUT)
+    hashing.start()
+    vote_buffer.start()
+    notifications.start()
+    ranking.start()
+    replicas.start()
+    metrics.start()
+    yield
+    await metrics.stop()
+    await replicas.stop()
+    await ranking.stop()
+    await notifications.stop()
+    await vote_buffer.stop()
+    hashing.shutdown()
+    await engine.dispose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"
-    ],
+    allow_origins=[origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, query_stats.QUERIES_HEADER, query_stats.TIME_HEADER,
+                    query_stats.N_PLUS_ONE_HEADER],
 )
-models.Base.metadata.create_all(bind=engine)
+
+query_stats.instrument(engine)
+for replica in replicas.replicas:
+    query_stats.instrument(replica.engine)
+if settings.SQL_DEBUG:
+    app.middleware("http")(query_stats.middleware)
+if replicas.replicas:
+    app.middleware("http")(replicas.middleware)
+app.add_middleware(metrics.PrometheusMiddleware)
 
 
 app.include_router(post.router, tags=["post"])
@@ -24,3 +57,6 @@ app.include_router(vote.router)
 app.include_router(profile.router, tags=["profile"])
 app.include_router(follow.router, tags=["follow"])
 app.include_router(feed.router, tags=["feed"])
+app.include_router(notification.router)
+app.include_router(health.router)
+app.include_router(metrics_router.router)
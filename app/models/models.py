@@ -1,13 +1,30 @@
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.utils.database import Base
-from sqlalchemy import Table, ForeignKey, Integer, String, Column, Boolean, TIMESTAMP, text
+from sqlalchemy import Table, ForeignKey, Integer, String, Column, Boolean, Float, TIMESTAMP, Index, DDL, event, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+# Text search configuration shared by the stored vector and the queries against it
+SEARCH_CONFIG = "english"
+
+
+def search_document(row: str = "") -> str:
+    """SQL for a post's weighted search vector; titles rank above body text. row prefixes the columns."""
+    return (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}content, '')), 'B')"
+    )
+
 
 followers_table = Table(
     "followers",
     Base.metadata,
     Column("follower_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
     Column("followed_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
-    Column("created_at", TIMESTAMP(timezone=True), server_default=text('now()'), nullable=False)
+    Column("created_at", TIMESTAMP(timezone=True), server_default=text('now()'), nullable=False),
+    # The primary key only serves lookups by follower; these back the newest-first
+    # followers / following listings
+    Index("ix_followers_followed_id_created_at", "followed_id", "created_at", "follower_id"),
+    Index("ix_followers_follower_id_created_at", "follower_id", "created_at", "followed_id"),
 )
 
 
@@ -19,11 +36,42 @@ class Post(Base):
     published = Column(Boolean, nullable=False, server_default='True')
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    votes_count = Column(Integer, nullable=False, server_default=text('0'))
+    comments_count = Column(Integer, nullable=False, server_default=text('0'))
+    # Decayed engagement, maintained by app.utils.ranking
+    hot_score = Column(Float, nullable=False, server_default=text('0'))
+    # Set by the post_search_vector trigger on insert and on title/content updates. A trigger
+    # rather than a generated column, which could only be added by rewriting the table
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
+    __table_args__ = (
+        Index("ix_post_search_vector", "search_vector", postgresql_using="gin"),
+        # Sort=hot walks this backwards; Sort=top and the newest-first listings range-scan by age
+        Index("ix_post_hot_score", "hot_score", "id"),
+        Index("ix_post_created_at", "created_at", "id"),
+        # Profile listings: one author's posts, newest first
+        Index("ix_post_user_id_created_at", "user_id", "created_at", "id"),
+    )
 
     # Use back_populates for a clear, two-way link
     owner = relationship("User", back_populates="posts")
 
 
+# The trigger behind Post.search_vector, for schemas built with create_all (migrations create their own)
+event.listen(Post.__table__, "after_create", DDL(f"""
+    CREATE OR REPLACE FUNCTION post_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {search_document("NEW.")};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+"""))
+event.listen(Post.__table__, "after_create", DDL(
+    "CREATE TRIGGER post_search_vector BEFORE INSERT OR UPDATE OF title, content ON post "
+    "FOR EACH ROW EXECUTE FUNCTION post_search_vector_update()"
+))
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -36,14 +84,21 @@ class User(Base):
     bio = Column(String, nullable=True)
     avatar_url = Column(String, nullable=True)
     location = Column(String, nullable=True)
+    followers_count = Column(Integer, nullable=False, server_default=text('0'))
+    following_count = Column(Integer, nullable=False, server_default=text('0'))
+    posts_count = Column(Integer, nullable=False, server_default=text('0'))
 
     posts = relationship("Post", back_populates="owner")
+    # Edges are read and written through app.utils.follows; lazy="raise" keeps these
+    # collections from ever being loaded whole, and the FK cascade removes them on delete
     following = relationship(
         "User",
         secondary=followers_table,
         primaryjoin=(followers_table.c.follower_id == id),
         secondaryjoin=(followers_table.c.followed_id == id),
-        back_populates="followers"
+        back_populates="followers",
+        lazy="raise",
+        passive_deletes=True,
     )
 
     # This relationship is created automatically by the 'back_populates' above
@@ -52,7 +107,9 @@ class User(Base):
         secondary=followers_table,
         primaryjoin=(followers_table.c.followed_id == id),
         secondaryjoin=(followers_table.c.follower_id == id),
-        back_populates="following"
+        back_populates="following",
+        lazy="raise",
+        passive_deletes=True,
     )
 
 
@@ -64,8 +121,17 @@ class Comments(Base):
     post_id = Column(Integer, ForeignKey("post.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text('now()'), nullable=False)
     parent_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True)
+    # Direct replies, so collapsed branches can show a count without loading them
+    replies_count = Column(Integer, nullable=False, server_default=text('0'))
+    likes_count = Column(Integer, nullable=False, server_default=text('0'))
 
     # Changed 'author' to 'owner' to match the schema
+    __table_args__ = (
+        # A post's comments and a comment's replies, both read oldest first
+        Index("ix_comments_post_id_created_at", "post_id", "created_at", "id"),
+        Index("ix_comments_parent_id_created_at", "parent_id", "created_at", "id"),
+    )
+
     owner = relationship("User", backref="comments")
     post = relationship("Post", backref="comments")
     replies = relationship("Comments", backref="parent", remote_side=[id])
@@ -76,6 +142,11 @@ class Vote(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     post_id = Column(Integer, ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
 
+    # The primary key leads with user_id; counting or cascading by post needs its own index
+    __table_args__ = (
+        Index("ix_votes_post_id", "post_id"),
+    )
+
     # Add these
     user = relationship("User", backref="votes")
     post = relationship("Post", backref="votes")
@@ -86,5 +157,51 @@ class CommentLike(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
     comment_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), primary_key=True)
 
+    __table_args__ = (
+        Index("ix_comment_likes_comment_id", "comment_id"),
+    )
+
     user = relationship("User", backref="comment_likes")
     comment = relationship("Comments", backref="likes")
+
+
+class Timeline(Base):
+    """Materialized home feed: one row per (reader, post) written when the post is created."""
+    __tablename__ = "timeline"
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id = Column(Integer, ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_timeline_user_id_created_at", "user_id", "created_at", "post_id"),
+    )
+
+
+class Notification(Base):
+    """One inbox entry. While unread, further events of the same kind on the same target
+    update this row ("N people liked your post") instead of adding new ones."""
+    __tablename__ = "notifications"
+    id = Column(Integer, primary_key=True, nullable=False)
+    recipient_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # vote / comment: target is the post; reply / comment_like: the comment; follow: the recipient
+    kind = Column(String, nullable=False)
+    target_id = Column(Integer, nullable=False)
+    # The post the event belongs to, for linking; follows have none
+    post_id = Column(Integer, ForeignKey("post.id", ondelete="CASCADE"), nullable=True)
+    # No foreign key, so deleting an account never scans this table; the inbox outer-joins it
+    last_actor_id = Column(Integer, nullable=True)
+    actors_count = Column(Integer, nullable=False, server_default=text('1'))
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    read_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # The coalescing key (ON CONFLICT target), and the unread count's index
+        Index("ix_notifications_unread", "recipient_id", "kind", "target_id", unique=True,
+              postgresql_where=text("read_at IS NULL")),
+        # The inbox, most recently updated first
+        Index("ix_notifications_recipient_id_updated_at", "recipient_id", "updated_at", "id"),
+        # Deleting a post cascades here
+        Index("ix_notifications_post_id", "post_id"),
+    )
@@ -1,9 +1,9 @@
 from fastapi import Depends, APIRouter, HTTPException, status
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..schemas import token
 from ..models import models
-from ..utils import utils
+from ..utils import hashing
 from ..utils import oauth2, database
 from fastapi.security.oauth2 import OAuth2PasswordRequestForm
 router = APIRouter(
@@ -11,14 +11,21 @@ router = APIRouter(
 )
 
 @router.post("/login", response_model=token.Token)
-def login(user_cred: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
-    user = db.query(models.User).filter(
+async def login(user_cred: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(database.get_db)):
+    user = await db.scalar(select(models.User).where(
         or_(
             models.User.email == user_cred.username,
             models.User.user_name == user_cred.username
         )
-    ).first()
-    if not user or not utils.verify_password(user_cred.password, user.password):
+    ))
+    if not user:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
+    valid, new_hash = await hashing.verify_and_update_password(user_cred.password, user.password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
+    if new_hash:
+        # The stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the password
+        user.password = new_hash
+        await db.commit()
     access_token = oauth2.create_access_token(data={"user_id": user.id})
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,13 +1,15 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Response, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .post import router
 from ..schemas.user import UserProfileWithFollows
 from ..utils.database import get_db
+from ..utils.replicas import get_read_db
 from ..models import models
-from ..schemas import token
+from ..schemas import token, user
 from ..utils import utils
-from ..utils import oauth2
+from ..utils import oauth2, follows, timeline, suggestions, notifications
 
 
 router = APIRouter(
@@ -15,48 +17,81 @@ router = APIRouter(
     tags=["follow"]
 )
 
+@router.get("/status", response_model=dict[int, bool])
+async def following_status(
+        user_ids: List[int] = Query(..., max_length=100),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: models.User = Depends(oauth2.get_current_user)
+):
+    """Whether the caller follows each of up to 100 users, in one query."""
+    followed = await follows.following_among(db, current_user.id, user_ids)
+    return {user_id: user_id in followed for user_id in user_ids}
+
+
+@router.get("/suggestions", response_model=List[user.SuggestedUser])
+async def get_suggestions(
+        limit: int = Query(10, ge=1, le=50),
+        db: AsyncSession = Depends(get_read_db),
+        current_user: models.User = Depends(oauth2.get_current_user)
+):
+    """Accounts followed by the people you follow, ranked by how many of them follow each."""
+    ranked = await suggestions.suggest(db, current_user.id, limit)
+    if not ranked:
+        return []
+    users = {
+        u.id: u for u in (await db.execute(
+            select(models.User.id, models.User.name, models.User.user_name, models.User.avatar_url)
+            .where(models.User.id.in_([user_id for user_id, _ in ranked]))
+        )).all()
+    }
+    return [
+        {**users[user_id]._mapping, "mutuals": mutuals}
+        for user_id, mutuals in ranked if user_id in users
+    ]
+
 
 @router.post("/users/{user_name}/follow", status_code=status.HTTP_204_NO_CONTENT)
-def follow_user(
+async def follow_user(
         user_name: str,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: models.User = Depends(oauth2.get_current_user)
 ):
-    user_to_follow = db.query(models.User).filter(models.User.user_name == user_name).first()
+    user_to_follow = await db.scalar(select(models.User).where(models.User.user_name == user_name))
     if not user_to_follow:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     if current_user.user_name == user_name:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You cannot follow yourself")
 
-    if user_to_follow in current_user.following:
-        # idempotent: already following
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-
-    current_user.following.append(user_to_follow)
-    db.commit()
+    # idempotent: a concurrent or repeated follow inserts nothing and changes no counters
+    if await follows.follow(db, current_user.id, user_to_follow.id):
+        await timeline.backfill(db, current_user.id, user_to_follow)
+        await db.commit()
+        await suggestions.on_follow(db, current_user.id, user_to_follow.id)
+        notifications.notify("follow", user_to_follow.id, current_user.id)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 
 @router.delete("/users/{user_id}/follow", status_code=status.HTTP_204_NO_CONTENT)
-def unfollow_user(
+async def unfollow_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(oauth2.get_current_user)
 ):
 
-    user_to_unfollow = db.query(models.User).filter(models.User.id == user_id).first()
+    user_exists = await db.scalar(select(models.User.id).where(models.User.id == user_id))
 
 
-    if not user_to_unfollow:
+    if not user_exists:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-    if user_to_unfollow not in current_user.following:
-        # idempotent: already not following
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-    current_user.following.remove(user_to_unfollow)
-    db.commit()
+    # idempotent: unfollowing someone you don't follow deletes nothing
+    if await follows.unfollow(db, current_user.id, user_id):
+        await timeline.retract(db, current_user.id, user_id)
+        await db.commit()
+        await suggestions.on_unfollow(db, current_user.id, user_id)
+        notifications.retract("follow", user_id, current_user.id)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
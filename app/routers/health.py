@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Response, status
+from ..utils import database, hashing, replicas
+from ..utils.cache import caches
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+
+@router.get("/live")
+async def liveness():
+    """The process is up and serving; never touches the database."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """The worker can reach the database and should receive traffic."""
+    if not await database.ping(timeout=2):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "unavailable"}
+    return {"status": "ok"}
+
+
+@router.get("/caches")
+async def cache_stats():
+    """Size and hit/miss counters of this worker's in-process caches."""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@router.get("/hashing")
+async def hashing_stats():
+    """Load on this worker's password hashing pool: queued and running jobs and queue wait."""
+    return hashing.stats()
+
+
+@router.get("/replicas")
+async def replica_stats():
+    """Lag of each read replica at this worker's last check, and whether it serves reads."""
+    return replicas.stats()
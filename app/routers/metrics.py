@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from ..utils import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus exposition format; aggregated over all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
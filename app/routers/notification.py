@@ -0,0 +1,95 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+from ..schemas import notification
+from ..utils import oauth2, notifications
+from ..utils.database import get_db
+from ..utils.pagination import keyset, set_next_cursor
+from ..utils.replicas import get_read_db, read_session
+
+router = APIRouter(
+    prefix="/notifications",
+    tags=["notifications"]
+)
+
+
+@router.get("/", response_model=List[notification.Notification])
+async def get_notifications(
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        current_user: models.User = Depends(oauth2.get_current_user),
+        limit: int = 20,
+        cursor: str | None = None
+):
+    """The caller's inbox, most recently updated first; follow X-Next-Cursor for older entries."""
+    limit = max(1, min(limit, 100))
+    n = models.Notification
+    query = (
+        select(
+            n.id, n.kind, n.target_id, n.post_id, n.actors_count, n.read_at, n.created_at, n.updated_at,
+            models.User.id.label("actor_id"), models.User.name, models.User.user_name, models.User.avatar_url,
+        )
+        .outerjoin(models.User, models.User.id == n.last_actor_id)
+        .where(n.recipient_id == current_user.id)
+    )
+    rows = (await db.execute(keyset(query, (n.updated_at, n.id), limit, cursor=cursor))).all()
+    rows = set_next_cursor(response, rows, limit, lambda r: (r.updated_at, r.id))
+    return [
+        {
+            "id": r.id,
+            "kind": r.kind,
+            "target_id": r.target_id,
+            "post_id": r.post_id,
+            "actors_count": r.actors_count,
+            "actor": None if r.actor_id is None else {
+                "id": r.actor_id, "name": r.name, "user_name": r.user_name, "avatar_url": r.avatar_url,
+            },
+            "read": r.read_at is not None,
+            "created_at": r.created_at,
+            "updated_at": r.updated_at,
+        }
+        for r in rows
+    ]
+
+
+@router.get("/unread", response_model=notification.UnreadCount)
+async def get_unread_count(request: Request, current_user: models.User = Depends(oauth2.get_current_user)):
+    """Unread entries, up to 100. Polled on every page load: usually answered from the worker's cache."""
+    unread = notifications.cached_unread(current_user.id)
+    if unread is None:
+        # Only a cache miss opens a session
+        async with read_session(request) as db:
+            unread = await notifications.unread_count(db, current_user.id)
+    return {"unread": unread}
+
+
+@router.post("/read", status_code=status.HTTP_204_NO_CONTENT)
+async def mark_all_read(db: AsyncSession = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
+    """Mark every unread entry read; new events then start new entries."""
+    n = models.Notification
+    await db.execute(
+        update(n).where(n.recipient_id == current_user.id, n.read_at.is_(None)).values(read_at=func.now())
+    )
+    await db.commit()
+    notifications.forget_unread(current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/{id}/read", status_code=status.HTTP_204_NO_CONTENT)
+async def mark_read(id: int, db: AsyncSession = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
+    """Mark one entry read; repeating it is a no-op."""
+    n = models.Notification
+    found = await db.scalar(
+        update(n).where(n.id == id, n.recipient_id == current_user.id)
+        .values(read_at=func.coalesce(n.read_at, func.now()))
+        .returning(n.id)
+    )
+    if found is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found")
+    await db.commit()
+    notifications.forget_unread(current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
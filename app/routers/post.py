@@ -1,163 +1,324 @@
-from fastapi import Depends
-from fastapi import Response, status, HTTPException, APIRouter
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import Depends, Query
+from fastapi import Request, Response, status, HTTPException, APIRouter
+from pydantic import TypeAdapter
+from sqlalchemy import select, delete, literal, literal_column, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from typing import List, Literal
 from sqlalchemy.sql.functions import func
 from ..schemas import token, post
 from ..models import models
-from ..utils import oauth2
+from ..utils import oauth2, counters, timeline, response_cache, listing, vote_buffer, ranking, notifications
+from ..utils.pagination import NEXT_CURSOR_HEADER, keyset, set_next_cursor, encode_cursor
 from app.utils.database import get_db
+from app.utils.replicas import get_read_db
 
 router = APIRouter(
     prefix="/posts",
     tags=["post"]
 )
 
+# Built once at import; the comment tree is nested ORM data, so it still goes through pydantic
+comment_nodes = TypeAdapter(list[post.CommentNode])
+
 
 @router.get("/", response_model=List[post.PostDetailResponse])
-def get_all_posts(db: Session = Depends(get_db), Limit: int = 10, Skip: int = 0, Search: str | None = ""):
-    votes_subquery = (
-        select(func.count(models.Vote.post_id))
-        .where(models.Vote.post_id == models.Post.id)
-        .label("votes")
-    )
-    comments_subquery = (
-        select(func.count(models.Comments.id))
-        .where(models.Comments.post_id == models.Post.id)
-        .label("comments_count")
-    )
-    results = (
-        db.query(models.Post, votes_subquery, comments_subquery)
-        .options(joinedload(models.Post.owner))
-        .filter(models.Post.title.contains(Search))
-        .order_by(models.Post.created_at.desc())
-        .limit(Limit)
-        .offset(Skip)
-        .all()
-    )
+async def get_all_posts(request: Request, response: Response, db: AsyncSession = Depends(get_read_db), Limit: int = 10,
+                  Skip: int = 0, Search: str | None = "", Cursor: str | None = None,
+                  SearchMode: Literal["title", "fulltext"] = "title", Sort: Literal["new", "hot", "top"] = "new",
+                  Window: Literal["day", "week"] = "day"):
+    """List posts newest first, by hot score (Sort=hot), or by engagement within a day or week (Sort=top).
 
-    formatted_results = [
-        {"Post": post, "votes": votes, "comments_count": comments}
-        for post, votes, comments in results
-    ]
+    Fulltext searches are always ordered by relevance.
+    """
+    if cached := response_cache.lookup(request):
+        return cached
+    if SearchMode == "fulltext" and Search:
+        # GIN-indexed match over title and content, best matches first
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{models.SEARCH_CONFIG}'::regconfig"), Search)
+        rank = func.ts_rank_cd(models.Post.search_vector, ts_query).label("rank")
+        query = listing.select_posts(rank).where(models.Post.search_vector.op("@@")(ts_query))
+        results = (await db.execute(keyset(query, (rank, models.Post.id), Limit, Skip, Cursor, types=(float, int)))).all()
+        results = set_next_cursor(response, results, Limit, lambda row: (row.rank, row.id))
+    elif Sort == "hot":
+        query = listing.select_posts(models.Post.hot_score).where(models.Post.title.contains(Search))
+        results = (await db.execute(keyset(query, (models.Post.hot_score, models.Post.id), Limit, Skip, Cursor,
+                                           types=(float, int)))).all()
+        results = set_next_cursor(response, results, Limit, lambda row: (row.hot_score, row.id))
+    elif Sort == "top":
+        score = ranking.engagement().label("score")
+        query = listing.select_posts(score).where(
+            models.Post.title.contains(Search),
+            models.Post.created_at >= func.now() - ranking.WINDOWS[Window],
+        )
+        results = (await db.execute(keyset(query, (score, models.Post.id), Limit, Skip, Cursor,
+                                           types=(float, int)))).all()
+        results = set_next_cursor(response, results, Limit, lambda row: (row.score, row.id))
+    else:
+        query = listing.select_posts().where(models.Post.title.contains(Search))
+        results = (await db.execute(keyset(query, (models.Post.created_at, models.Post.id), Limit, Skip, Cursor))).all()
+        results = set_next_cursor(response, results, Limit, lambda row: (row.created_at, row.id))
 
-    return formatted_results
+    body = listing.render([listing.post_detail(row) for row in results])
+    return response_cache.store(request, response, body, (response_cache.LISTINGS,))
 
 
 @router.get("/{user_id}/posts", response_model=List[post.PostDetailResponse])
-def get_user_posts(
+async def get_user_posts(
         user_id: int,
-        db: Session = Depends(get_db),
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
         limit: int = 10,
-        skip: int = 0
+        skip: int = 0,
+        cursor: str | None = None
 ):
     """Get all posts by a specific user."""
-    votes_subquery = (
-        select(func.count(models.Vote.post_id))
-        .where(models.Vote.post_id == models.Post.id)
-        .label("votes")
-    )
-    comments_subquery = (
-        select(func.count(models.Comments.id))
-        .where(models.Comments.post_id == models.Post.id)
-        .label("comments_count")
-    )
+    if cached := response_cache.lookup(request):
+        return cached
+    query = listing.select_posts().where(models.Post.user_id == user_id)
+    results = (await db.execute(keyset(query, (models.Post.created_at, models.Post.id), limit, skip, cursor))).all()
+    results = set_next_cursor(response, results, limit, lambda row: (row.created_at, row.id))
 
-    results = (
-        db.query(models.Post, votes_subquery, comments_subquery)
-        .options(joinedload(models.Post.owner))
-        .filter(models.Post.user_id == user_id)
-        .order_by(models.Post.created_at.desc())
-        .limit(limit)
-        .offset(skip)
-        .all()
+    body = listing.render([listing.post_detail(row) for row in results])
+    return response_cache.store(request, response, body, (response_cache.author(user_id),))
+
+
+@router.get("/{id}", response_model=post.PostThreadResponse)
+async def get_post(id: int, response: Response, db: AsyncSession = Depends(get_read_db),
+             current_user: models.User | None = Depends(oauth2.get_current_user_optional)):
+    """Get one post with its owner, counts, the viewer's vote and the first page of its comment tree."""
+    viewer_id = current_user.id if current_user else None
+    voted = (
+        select(models.Vote.post_id)
+        .where(models.Vote.post_id == models.Post.id, models.Vote.user_id == viewer_id)
+        .exists()
     )
+    row = (await db.execute(
+        select(models.Post, voted)
+        .options(joinedload(models.Post.owner))
+        .where(models.Post.id == id)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {id} does not exist")
+    found_post, has_voted = row
 
-    return [
-        {"Post": post, "votes": votes, "comments_count": comments}
-        for post, votes, comments in results
-    ]
+    roots = await _comment_roots(db, response, id, COMMENT_PAGE, None)
+    tree = await _comment_tree(db, [r.id for r in roots], 3, 3, viewer_id)
+
+    return {
+        "Post": found_post,
+        "votes": found_post.votes_count + vote_buffer.pending_votes(id),
+        "comments_count": found_post.comments_count,
+        "voted": vote_buffer.voted(id, viewer_id, has_voted),
+        "comments": tree,
+        "comments_cursor": response.headers.get(NEXT_CURSOR_HEADER),
+    }
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=post.Postres)
-async def create_post(post: post.PostCreate, db: Session = Depends(get_db), current_user: int = Depends(
+async def create_post(post: post.PostCreate, db: AsyncSession = Depends(get_db), current_user: int = Depends(
     oauth2.get_current_user)):
-    new_post = models.Post(user_id = current_user.id, **post.model_dump())
-    print(current_user.id)
+    new_post = models.Post(user_id=current_user.id, **post.model_dump())
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
-    return new_post
+    await db.flush()
+    await counters.bump(db, models.User, current_user.id, posts_count=1)
+    await ranking.rescore(db, new_post.id)
+    await timeline.fan_out(db, new_post)
+    await db.commit()
+    response_cache.invalidate(response_cache.LISTINGS, response_cache.author(current_user.id))
+    await db.refresh(new_post)
+    return {**new_post.__dict__, "owner": current_user}
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_post(id: int, db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
-    post_query = db.query(models.Post).filter(models.Post.id == id)
-    post = post_query.first()
-    db.commit()
+async def delete_post(id: int, db: AsyncSession = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    post = await db.get(models.Post, id)
     if post is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {id} does not exist")
     if post.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform requested action")
-    post_query.delete(synchronize_session=False)
-    db.commit()
+    await db.execute(delete(models.Post).where(models.Post.id == id))
+    await counters.bump(db, models.User, current_user.id, posts_count=-1)
+    await db.commit()
+    response_cache.invalidate(response_cache.LISTINGS, response_cache.author(current_user.id), response_cache.thread(id))
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.put("/{id}")
-def update_post(id: int, post: post.PostUpdate, db: Session = Depends(get_db), current_user: int = Depends(
+async def update_post(id: int, post: post.PostUpdate, db: AsyncSession = Depends(get_db), current_user: int = Depends(
     oauth2.get_current_user)):
-    post_query = db.query(models.Post).filter(models.Post.id == id)
-    updated_post = post_query.first()
+    updated_post = await db.get(models.Post, id)
     if updated_post is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {id} does not exist")
     if updated_post.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform requested action")
-    post_query.update(post.model_dump(), synchronize_session=False)
-    db.commit()
-    return {'data': post_query.first()}
+    for field, value in post.model_dump().items():
+        setattr(updated_post, field, value)
+    await db.commit()
+    response_cache.invalidate(response_cache.LISTINGS, response_cache.author(current_user.id))
+    await db.refresh(updated_post)
+    return {'data': updated_post}
 
 @router.post("/{post_id}/comment", response_model=post.CommentResponse, status_code=status.HTTP_201_CREATED)
-def add_comment_to_post(post_id: int, comment: post.CommentCreate, db: Session = Depends(get_db),
+async def add_comment_to_post(post_id: int, comment: post.CommentCreate, db: AsyncSession = Depends(get_db),
                         current_user: int = Depends(oauth2.get_current_user)):
-    post_query = db.query(models.Post).filter(models.Post.id == post_id)
-    found_post = post_query.first()
+    found_post = await db.get(models.Post, post_id)
     if not found_post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {post_id} does not exist")
     new_comment = models.Comments(post_id=post_id, user_id=current_user.id, **comment.model_dump())
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
-    # eager load owner for response
-    _ = new_comment.owner
-    return new_comment
+    await counters.bump(db, models.Post, post_id, comments_count=1)
+    await ranking.rescore(db, post_id)
+    await db.commit()
+    response_cache.invalidate(response_cache.thread(post_id))
+    notifications.notify("comment", post_id, current_user.id)
+    await db.refresh(new_comment)
+    return {**new_comment.__dict__, "owner": current_user}
 
 
 @router.get("/{post_id}/comments", response_model=list[post.CommentResponse])
-def get_comments_for_post(post_id: int, db: Session = Depends(get_db)):
-    post = db.query(models.Post).filter(models.Post.id == post_id).first()
+async def get_comments_for_post(post_id: int, response: Response, db: AsyncSession = Depends(get_read_db),
+                                limit: int = 20, cursor: str | None = None):
+    """A page of every comment on a post, replies included, oldest first."""
+    post = await db.get(models.Post, post_id)
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {post_id} does not exist")
-    comments = (
-        db.query(models.Comments)
+    limit = min(limit, MAX_COMMENT_PAGE)
+    query = (
+        select(models.Comments)
         .options(joinedload(models.Comments.owner))
-        .filter(models.Comments.post_id == post_id)
-        .order_by(models.Comments.created_at.asc())
-        .all()
+        .where(models.Comments.post_id == post_id)
+    )
+    comments = (await db.scalars(keyset(query, (models.Comments.created_at, models.Comments.id), limit, cursor=cursor,
+                                        descending=False))).all()
+    return set_next_cursor(response, comments, limit, lambda c: (c.created_at, c.id))
+
+
+# Top-level comments embedded in GET /posts/{id}
+COMMENT_PAGE = 20
+# Bounds on what the tree endpoints expand in one response: comments per page, children
+# per node, nesting, and the total node count (the deepest levels are cut first)
+MAX_COMMENT_PAGE = 50
+MAX_COMMENT_REPLIES = 10
+MAX_COMMENT_DEPTH = 8
+MAX_COMMENT_NODES = 500
+
+
+async def _comment_roots(db: AsyncSession, response: Response, post_id: int, limit: int, cursor: str | None) -> list:
+    """A page of a post's top-level comments, oldest first."""
+    limit = min(limit, MAX_COMMENT_PAGE)
+    query = select(models.Comments.id, models.Comments.created_at).where(
+        models.Comments.post_id == post_id,
+        models.Comments.parent_id.is_(None)
     )
+    roots = (await db.execute(keyset(query, (models.Comments.created_at, models.Comments.id), limit, cursor=cursor,
+                                     descending=False))).all()
+    return set_next_cursor(response, roots, limit, lambda r: (r.created_at, r.id))
 
-    return comments
+
+async def _comment_tree(db: AsyncSession, root_ids: list[int], depth: int, replies: int,
+                        viewer_id: int | None = None) -> list[dict]:
+    """Expand root comments into nested dicts in a single recursive query.
+
+    Each node gets at most `replies` children, oldest first, down to `depth` levels;
+    anything beyond that is left collapsed and described by replies_count/replies_cursor.
+    With a viewer, each node also says whether they liked it.
+    """
+    depth = max(1, min(depth, MAX_COMMENT_DEPTH))
+    replies = max(0, min(replies, MAX_COMMENT_REPLIES))
+    tree = (
+        select(models.Comments.id, literal(1).label("depth"))
+        .where(models.Comments.id.in_(root_ids))
+        .cte("tree", recursive=True)
+    )
+    children = (
+        select(models.Comments.id)
+        .where(models.Comments.parent_id == tree.c.id)
+        .order_by(models.Comments.created_at.asc(), models.Comments.id.asc())
+        .limit(replies)
+        .lateral("children")
+    )
+    tree = tree.union_all(
+        select(children.c.id, tree.c.depth + 1)
+        .select_from(tree.join(children, true()))
+        .where(tree.c.depth < depth)
+    )
+    # The recursion runs breadth first and stops once MAX_COMMENT_NODES rows are taken
+    taken = select(tree.c.id).limit(MAX_COMMENT_NODES).subquery("taken")
+    liked = (
+        select(models.CommentLike.comment_id)
+        .where(models.CommentLike.comment_id == models.Comments.id, models.CommentLike.user_id == viewer_id)
+        .exists()
+        if viewer_id is not None else literal(False)
+    )
+    result = (await db.execute(
+        select(models.Comments, liked)
+        .options(joinedload(models.Comments.owner))
+        .join(taken, taken.c.id == models.Comments.id)
+        .order_by(models.Comments.created_at.asc(), models.Comments.id.asc())
+    )).all()
+
+    nodes = {
+        c.id: {**c.__dict__, "likes": c.likes_count, "liked": is_liked, "replies": [], "replies_cursor": None}
+        for c, is_liked in result
+    }
+    for c, _ in result:
+        if c.id not in root_ids and c.parent_id in nodes:
+            nodes[c.parent_id]["replies"].append(nodes[c.id])
+    for node in nodes.values():
+        shown = node["replies"]
+        if shown and len(shown) < node["replies_count"]:
+            node["replies_cursor"] = encode_cursor(shown[-1]["created_at"], shown[-1]["id"])
+    return [nodes[i] for i in root_ids if i in nodes]
+
+
+@router.get("/{post_id}/comments/tree", response_model=list[post.CommentNode])
+async def get_comment_tree(post_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db),
+                     limit: int = 20, cursor: str | None = None, depth: int = 3, replies: int = 3):
+    """Get a page of top-level comments with their replies nested up to `depth` levels."""
+    if cached := response_cache.lookup(request):
+        return cached
+    found_post = await db.scalar(select(models.Post.id).where(models.Post.id == post_id))
+    if not found_post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {post_id} does not exist")
+    roots = await _comment_roots(db, response, post_id, limit, cursor)
+    tree = await _comment_tree(db, [r.id for r in roots], depth, replies)
+    body = comment_nodes.dump_json(comment_nodes.validate_python(tree, from_attributes=True))
+    return response_cache.store(request, response, body, (response_cache.thread(post_id),))
+
+
+@router.get("/comments/{comment_id}/replies", response_model=list[post.CommentNode])
+async def get_comment_replies(comment_id: int, request: Request, response: Response,
+                        db: AsyncSession = Depends(get_read_db), limit: int = 20, cursor: str | None = None,
+                        depth: int = 3, replies: int = 3):
+    """Load more replies under one comment, continuing from its replies_cursor."""
+    if cached := response_cache.lookup(request):
+        return cached
+    post_id = await db.scalar(select(models.Comments.post_id).where(models.Comments.id == comment_id))
+    if post_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+    query = select(models.Comments.id, models.Comments.created_at).where(
+        models.Comments.parent_id == comment_id
+    )
+    limit = min(limit, MAX_COMMENT_PAGE)
+    children = (await db.execute(keyset(query, (models.Comments.created_at, models.Comments.id), limit, cursor=cursor,
+                                        descending=False))).all()
+    children = set_next_cursor(response, children, limit, lambda r: (r.created_at, r.id))
+    tree = await _comment_tree(db, [r.id for r in children], depth, replies)
+    body = comment_nodes.dump_json(comment_nodes.validate_python(tree, from_attributes=True))
+    return response_cache.store(request, response, body, (response_cache.thread(post_id),))
 
 
 @router.post("/{comment_id}/reply", response_model=post.CommentResponse, status_code=status.HTTP_201_CREATED)
-def create_reply_to_comment(
+async def create_reply_to_comment(
         comment_id: int,
         reply: post.CommentCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: models.User = Depends(oauth2.get_current_user)
 ):
 
-    parent_comment = db.query(models.Comments).filter(models.Comments.id == comment_id).first()
+    parent_comment = await db.get(models.Comments, comment_id)
     if not parent_comment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent comment not found")
     new_reply = models.Comments(
@@ -168,47 +329,64 @@ def create_reply_to_comment(
     )
 
     db.add(new_reply)
-    db.commit()
-    db.refresh(new_reply)
-    _ = new_reply.owner
+    await counters.bump(db, models.Post, parent_comment.post_id, comments_count=1)
+    await counters.bump(db, models.Comments, comment_id, replies_count=1)
+    await ranking.rescore(db, parent_comment.post_id)
+    await db.commit()
+    response_cache.invalidate(response_cache.thread(parent_comment.post_id))
+    notifications.notify("reply", comment_id, current_user.id)
+    await db.refresh(new_reply)
 
-    return new_reply
+    return {**new_reply.__dict__, "owner": current_user}
 
 
 # Comment likes
 @router.post("/comments/{comment_id}/like")
-def like_comment(comment_id: int, dir: int, db: Session = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
-    comment = db.query(models.Comments).filter(models.Comments.id == comment_id).first()
-    if not comment:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
-
-    existing = db.query(models.CommentLike).filter(
-        models.CommentLike.comment_id == comment_id,
-        models.CommentLike.user_id == current_user.id
-    ).first()
+async def like_comment(comment_id: int, dir: int, db: AsyncSession = Depends(get_db), current_user: models.User = Depends(oauth2.get_current_user)):
+    """Like (dir=1) or unlike a comment in a single statement; repeating a request is a no-op."""
+    not_found = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+    try:
+        changed, likes = await counters.toggle(
+            db, models.CommentLike, models.Comments, "likes_count", "comment_id", dir == 1,
+            user_id=current_user.id, comment_id=comment_id,
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise not_found
+    if likes is None:
+        raise not_found
+    await db.commit()
+    if changed:
+        if dir == 1:
+            notifications.notify("comment_like", comment_id, current_user.id)
+        else:
+            notifications.retract("comment_like", comment_id, current_user.id)
 
     if dir == 1:
-        if existing:
-            return {"message": "Already liked"}
-        new_like = models.CommentLike(user_id=current_user.id, comment_id=comment_id)
-        db.add(new_like)
-        db.commit()
-        return {"message": "Liked"}
+        message = "Liked" if changed else "Already liked"
     else:
-        if not existing:
-            return {"message": "Already unliked"}
-        db.delete(existing)
-        db.commit()
-        return {"message": "Unliked"}
+        message = "Unliked" if changed else "Already unliked"
+    return {"message": message, "liked": dir == 1, "likes": likes}
+
+
+@router.get("/comments/liked", response_model=list[int])
+async def get_liked_comments(ids: list[int] = Query(default=[], max_length=MAX_COMMENT_NODES),
+                             db: AsyncSession = Depends(get_read_db),
+                             current_user: models.User = Depends(oauth2.get_current_user)):
+    """Which of the given comments the viewer liked, for tree pages loaded from the shared cache."""
+    if not ids:
+        return []
+    return (await db.scalars(
+        select(models.CommentLike.comment_id)
+        .where(models.CommentLike.user_id == current_user.id, models.CommentLike.comment_id.in_(ids))
+    )).all()
 
 
 @router.get("/{post_id}/comments/likes")
-def get_comment_likes_for_post(post_id: int, db: Session = Depends(get_db)):
+async def get_comment_likes_for_post(post_id: int, db: AsyncSession = Depends(get_read_db)):
     # returns a mapping of comment_id -> likes_count for a given post
-    rows = db.execute(
-        select(models.Comments.id, func.count(models.CommentLike.user_id))
-        .join(models.CommentLike, models.CommentLike.comment_id == models.Comments.id, isouter=True)
+    rows = (await db.execute(
+        select(models.Comments.id, models.Comments.likes_count)
         .where(models.Comments.post_id == post_id)
-        .group_by(models.Comments.id)
-    ).all()
+    )).all()
     return {comment_id: count for comment_id, count in rows}
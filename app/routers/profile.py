@@ -1,12 +1,14 @@
-from fastapi import Depends, status, HTTPException, APIRouter
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from fastapi import Depends, status, HTTPException, APIRouter, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from ..models import models
 from ..schemas import token, user
 from ..schemas import post
-from ..utils import oauth2
+from ..utils import oauth2, response_cache, listing, follows
 from ..utils.database import get_db
+from ..utils.replicas import get_read_db
+from ..utils.pagination import keyset, set_next_cursor
 
 router = APIRouter(
     prefix="/profile",
@@ -14,134 +16,124 @@ router = APIRouter(
 )
 
 
-@router.get("/me", response_model=user.UserProfileResponse)
-def get_my_profile(
-        db: Session = Depends(get_db),
+@router.get("/me", response_model=user.UserProfileStats)
+async def get_my_profile(
+        db: AsyncSession = Depends(get_read_db),
         current_user: models.User = Depends(oauth2.get_current_user)
 ):
     """Get current user's profile with stats."""
-    # Calculate stats for current user
-    followers_count = db.query(models.followers_table).filter(
-        models.followers_table.c.followed_id == current_user.id
-    ).count()
+    # Stats are stored on the user row; is_following defaults to False for yourself
+    return await db.get(models.User, current_user.id)
 
-    following_count = db.query(models.followers_table).filter(
-        models.followers_table.c.follower_id == current_user.id
-    ).count()
 
-    posts_count = db.query(models.Post).filter(
-        models.Post.user_id == current_user.id
-    ).count()
-
-    return {
-        **current_user.__dict__,
-        "followers_count": followers_count,
-        "following_count": following_count,
-        "posts_count": posts_count,
-        "is_following": False  # User doesn't follow themselves
-    }
-
-
-@router.get("/{user_id}", response_model=user.UserProfileResponse)
-def get_user_profile(
+@router.get("/{user_id}", response_model=user.UserProfileStats)
+async def get_user_profile(
         user_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_read_db),
         current_user: models.User = Depends(oauth2.get_current_user)
 ):
     """Get user profile with stats."""
-    user_obj = db.query(models.User).filter(models.User.id == user_id).first()
+    user_obj = await db.get(models.User, user_id)
     if not user_obj:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Calculate stats
-    followers_count = db.query(models.followers_table).filter(
-        models.followers_table.c.followed_id == user_id
-    ).count()
-
-    following_count = db.query(models.followers_table).filter(
-        models.followers_table.c.follower_id == user_id
-    ).count()
-
-    posts_count = db.query(models.Post).filter(models.Post.user_id == user_id).count()
-
     # Check if current user follows this user
-    is_following = db.query(models.followers_table).filter(
-        models.followers_table.c.follower_id == current_user.id,
-        models.followers_table.c.followed_id == user_id
-    ).first() is not None
+    is_following = await follows.is_following(db, current_user.id, user_id)
 
     return {
         **user_obj.__dict__,
-        "followers_count": followers_count,
-        "following_count": following_count,
-        "posts_count": posts_count,
         "is_following": is_following
     }
 
 
-@router.put("/me", response_model=user.UserProfileResponse)
-def update_my_profile(
+@router.put("/me", response_model=user.UserProfileStats)
+async def update_my_profile(
         profile_update: user.UserProfileUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: models.User = Depends(oauth2.get_current_user)
 ):
     """Update current user's profile."""
     update_data = profile_update.model_dump(exclude_unset=True)
+    user_obj = await db.get(models.User, current_user.id)
 
     for field, value in update_data.items():
-        setattr(current_user, field, value)
-
-    db.commit()
-    db.refresh(current_user)
+        setattr(user_obj, field, value)
 
-    # Return with stats
-    followers_count = db.query(models.followers_table).filter(
-        models.followers_table.c.followed_id == current_user.id
-    ).count()
+    await db.commit()
+    await db.refresh(user_obj)
+    oauth2.invalidate_principal(current_user.id)
+    # Owner names are embedded in cached post and comment listings
+    response_cache.invalidate()
 
-    following_count = db.query(models.followers_table).filter(
-        models.followers_table.c.follower_id == current_user.id
-    ).count()
-
-    posts_count = db.query(models.Post).filter(
-        models.Post.user_id == current_user.id
-    ).count()
-
-    return {
-        **current_user.__dict__,
-        "followers_count": followers_count,
-        "following_count": following_count,
-        "posts_count": posts_count,
-        "is_following": False
-    }
+    return user_obj
 
 
 @router.get("/{user_id}/posts", response_model=List[post.PostDetailResponse])
-def get_user_posts(
+async def get_user_posts(
         user_id: int,
-        db: Session = Depends(get_db),
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
         limit: int = 10,
-        skip: int = 0
+        skip: int = 0,
+        cursor: str | None = None
 ):
     """Get all posts by a specific user."""
-    votes_subquery = (
-        select(func.count(models.Vote.post_id))
-        .where(models.Vote.post_id == models.Post.id)
-        .correlate_except(models.Vote)
-        .scalar_subquery()
-    )
+    query = listing.select_posts().where(models.Post.user_id == user_id)
+    results = (await db.execute(keyset(query, (models.Post.created_at, models.Post.id), limit, skip, cursor))).all()
+    results = set_next_cursor(response, results, limit, lambda row: (row.created_at, row.id))
+
+    return listing.json_response(response, [listing.post_detail(row) for row in results])
+
+
+# Most users one page of a follower or following list returns
+MAX_FOLLOW_PAGE = 100
+
 
-    results = (
-        db.query(models.Post, votes_subquery.label("votes"))
-        .filter(models.Post.user_id == user_id)
-        .order_by(models.Post.created_at.desc())
-        .limit(limit)
-        .offset(skip)
-        .all()
+async def _follow_list(db: AsyncSession, response: Response, viewer_id: int, edge_key, user_key, user_id: int,
+                       limit: int, cursor: str | None) -> list[dict]:
+    """One page of users on the far side of user_id's follow edges, newest edge first."""
+    limit = min(limit, MAX_FOLLOW_PAGE)
+    followers = models.followers_table
+    query = (
+        select(
+            models.User.id, models.User.name, models.User.user_name, models.User.avatar_url,
+            followers.c.created_at.label("followed_at"),
+        )
+        .join(followers, user_key == models.User.id)
+        .where(edge_key == user_id)
     )
+    rows = (await db.execute(keyset(query, (followers.c.created_at, user_key), limit, cursor=cursor))).all()
+    rows = set_next_cursor(response, rows, limit, lambda r: (r.followed_at, r.id))
+    # Viewer state for the whole page in one query
+    followed = await follows.following_among(db, viewer_id, [r.id for r in rows])
+    return [{**r._mapping, "is_following": r.id in followed} for r in rows]
 
-    return [
-        {**post.__dict__, "votes": votes if votes else 0}
-        for post, votes in results
-    ]
 
+@router.get("/{user_id}/followers", response_model=List[user.FollowListItem])
+async def get_followers(
+        user_id: int,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        current_user: models.User = Depends(oauth2.get_current_user),
+        limit: int = 20,
+        cursor: str | None = None
+):
+    """Users following user_id, most recent first."""
+    followers = models.followers_table
+    return await _follow_list(db, response, current_user.id, followers.c.followed_id, followers.c.follower_id,
+                              user_id, limit, cursor)
+
+
+@router.get("/{user_id}/following", response_model=List[user.FollowListItem])
+async def get_following(
+        user_id: int,
+        response: Response,
+        db: AsyncSession = Depends(get_read_db),
+        current_user: models.User = Depends(oauth2.get_current_user),
+        limit: int = 20,
+        cursor: str | None = None
+):
+    """Users that user_id follows, most recently followed first."""
+    followers = models.followers_table
+    return await _follow_list(db, response, current_user.id, followers.c.follower_id, followers.c.followed_id,
+                              user_id, limit, cursor)
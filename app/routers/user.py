@@ -1,61 +1,122 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from .post import router
 from ..utils.database import get_db
+from ..utils.replicas import get_read_db, read_session
 
 
 from ..models import models
 from ..schemas import token, user
-from ..utils import utils
+from ..utils import hashing, counters, response_cache
 from ..utils import oauth2
+from ..utils.pagination import keyset, set_next_cursor
 
 router = APIRouter(
     prefix="/users",
     tags=["user"]
 )
 
+# Public directory fields; never the email or password hash
+DIRECTORY_COLUMNS = (
+    models.User.id,
+    models.User.name,
+    models.User.user_name,
+    models.User.avatar_url,
+    models.User.bio,
+    models.User.followers_count,
+    models.User.created_at,
+)
+# Rows fetched per round trip while streaming the export
+EXPORT_BATCH_SIZE = 1000
+
+
 @router.post("/", status_code=status.HTTP_201_CREATED, response_model=
 user.UserProfileResponse)
-def create_user(known_user: user.UserCreate, db: Session = Depends(get_db)):
+async def create_user(known_user: user.UserCreate, db: AsyncSession = Depends(get_db)):
     try:
-        hashed = utils.hash_password(known_user.password)
+        # bcrypt is CPU-bound; keep it off the event loop
+        hashed = await hashing.hash_password(known_user.password)
         known_user.password = hashed
         new_user = models.User(**known_user.model_dump())
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         return new_user
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(e)
         raise HTTPException(status_code=400, detail="Failed to create user")
 
 
+async def _export_lines(request: Request):
+    # Own session: it has to outlive the handler and stay open while the response streams
+    async with read_session(request) as db:
+        result = await db.stream(
+            select(*DIRECTORY_COLUMNS)
+            .order_by(models.User.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_UTC_Z) + b"\n" for row in rows)
+
+
+# Declared before /{name} so "export" is not captured as a user name
+@router.get("/export")
+async def export_users(request: Request, current_user: models.User = Depends(oauth2.get_current_user)):
+    """The whole directory as NDJSON, read through a server-side cursor so memory use stays flat."""
+    return StreamingResponse(_export_lines(request), media_type="application/x-ndjson")
+
+
 @router.get("/{name}", response_model=user.Usergetprofile)
-def get_user(name: str, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.name == name).first()
+async def get_user(name: str, db: AsyncSession = Depends(get_read_db)):
+    user = await db.scalar(select(models.User).where(models.User.name == name))
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"User {name} was not found")
-    user_data = user.__dict__
-    user_data["followers_count"] = len(user.followers)
-    user_data["following_count"] = len(user.following)
-    return user_data
+    return user
+
+
+@router.get("/", response_model=List[user.UserDirectoryEntry])
+async def get_all_users(response: Response, db: AsyncSession = Depends(get_read_db), limit: int = 50, skip: int = 0,
+                        cursor: str | None = None):
+    """One page of the user directory in id order; follow X-Next-Cursor for the next page."""
+    limit = max(1, min(limit, 200))
+    query = select(*DIRECTORY_COLUMNS)
+    rows = (await db.execute(keyset(query, (models.User.id,), limit, skip, cursor, types=(int,),
+                                    descending=False))).all()
+    return set_next_cursor(response, rows, limit, lambda r: (r.id,))
 
-@router.get("/", response_model=List[user.UserCreate])
-def get_all_users(db: Session = Depends(get_db)):
-    query = db.query(models.User).all()
-    return query
 
 @router.delete('/me', status_code=status.HTTP_204_NO_CONTENT)
-def delete_user (db: Session = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
-    user = db.query(models.User).filter(models.User.id == current_user.id)
-    specified_user = user.first()
-    if not user:
+async def delete_user (db: AsyncSession = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authorized")
-    user.delete(synchronize_session=False)
-    db.commit()
+    # Rows that lose a vote, comment or follow edge to the cascade need their counters repaired
+    affected_posts = (
+        select(models.Vote.post_id).where(models.Vote.user_id == current_user.id)
+        .union(select(models.Comments.post_id).where(models.Comments.user_id == current_user.id))
+    )
+    affected_users = (
+        select(models.followers_table.c.followed_id).where(models.followers_table.c.follower_id == current_user.id)
+        .union(select(models.followers_table.c.follower_id).where(models.followers_table.c.followed_id == current_user.id))
+    )
+    affected_comments = (
+        select(models.Comments.parent_id)
+        .where(models.Comments.user_id == current_user.id, models.Comments.parent_id.is_not(None))
+        .union(select(models.CommentLike.comment_id).where(models.CommentLike.user_id == current_user.id))
+    )
+    post_ids = (await db.scalars(affected_posts)).all()
+    user_ids = (await db.scalars(affected_users)).all()
+    comment_ids = (await db.scalars(affected_comments)).all()
+    await db.execute(delete(models.User).where(models.User.id == current_user.id))
+    await counters.reconcile(db, post_ids=post_ids, user_ids=user_ids, comment_ids=comment_ids)
+    await db.commit()
+    oauth2.invalidate_principal(current_user.id)
+    response_cache.invalidate()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1,7 +1,10 @@
 from fastapi import status, HTTPException, APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..schemas import token, vote
 from ..models import models
-from ..utils import oauth2
+from ..utils import oauth2, counters, vote_buffer, ranking, notifications
 from app.utils.database import get_db
 
 router = APIRouter(
@@ -9,25 +12,57 @@ router = APIRouter(
     tags=["Vote"]
 )
 
-@router.post('/', status_code=status.HTTP_201_CREATED)
-def vote_post(vote: vote.vote, db=Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
-    post = db.query(models.Post).filter(models.Post.id == vote.post_id).first()
-    if not post:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {vote.post_id} does not exist")
+@router.post('/', status_code=status.HTTP_201_CREATED, response_model=vote.VoteResult)
+async def vote_post(vote: vote.vote, db: AsyncSession = Depends(get_db), current_user: int = Depends(oauth2.get_current_user)):
+    """Set or clear the caller's vote; repeating a request is a no-op.
 
-    vote_query = db.query(models.Vote).filter(models.Vote.post_id == vote.post_id, models.Vote.user_id == current_user.id)
-    found_vote = vote_query.first()
+    Written in a single statement, or buffered and written in batches when VOTE_WRITE_MODE=buffered.
+    """
+    not_found = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Post with id {vote.post_id} does not exist")
+    if vote_buffer.enabled():
+        # Read-only here: the row and the counter are written by the next flush
+        voted = (
+            select(models.Vote.post_id)
+            .where(models.Vote.post_id == models.Post.id, models.Vote.user_id == current_user.id)
+            .exists()
+        )
+        row = (await db.execute(
+            select(models.Post.votes_count, voted).where(models.Post.id == vote.post_id)
+        )).first()
+        if row is None:
+            raise not_found
+        stored_votes, stored_voted = row
+        changed = vote_buffer.record(vote.post_id, current_user.id, vote.dir == 1, stored_voted)
+        votes = stored_votes + vote_buffer.pending_votes(vote.post_id)
+    else:
+        changed, votes = await _vote_now(db, vote, current_user.id, not_found)
+    # Cached listings keep the old count and order until RESPONSE_CACHE_TTL runs out
+    if changed:
+        if vote.dir == 1:
+            notifications.notify("vote", vote.post_id, current_user.id)
+        else:
+            notifications.retract("vote", vote.post_id, current_user.id)
 
     if vote.dir == 1:
-        if found_vote:
-            return {"message": "Already liked"}
-        new_vote = models.Vote(post_id=vote.post_id, user_id=current_user.id)
-        db.add(new_vote)
-        db.commit()
-        return {"message": "Successfully added vote"}
+        message = "Successfully added vote" if changed else "Already liked"
     else:
-        if not found_vote:
-            return {"message": "Already unliked"}
-        vote_query.delete(synchronize_session=False)
-        db.commit()
-        return {"message": "Successfully deleted vote"}
\ No newline at end of file
+        message = "Successfully deleted vote" if changed else "Already unliked"
+    return {"message": message, "voted": vote.dir == 1, "votes": votes}
+
+
+async def _vote_now(db: AsyncSession, vote, user_id: int, not_found: HTTPException) -> tuple[bool, int]:
+    try:
+        changed, votes = await counters.toggle(
+            db, models.Vote, models.Post, "votes_count", "post_id", vote.dir == 1,
+            user_id=user_id, post_id=vote.post_id,
+        )
+    except IntegrityError:
+        # The votes -> post foreign key is the existence check
+        await db.rollback()
+        raise not_found
+    if votes is None:
+        raise not_found
+    if changed:
+        await ranking.rescore(db, vote.post_id)
+    await db.commit()
+    return changed, votes
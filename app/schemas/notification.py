@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+Kind = Literal["vote", "comment", "reply", "comment_like", "follow"]
+
+
+class NotificationActor(BaseModel):
+    id: int
+    name: str
+    user_name: str
+    avatar_url: str | None = None
+
+
+class Notification(BaseModel):
+    id: int
+    kind: Kind
+    # vote / comment: the post; reply / comment_like: the comment; follow: you
+    target_id: int
+    post_id: int | None = None
+    # Distinct people behind the entry; actor is the most recent of them
+    actors_count: int
+    actor: NotificationActor | None = None
+    read: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class UnreadCount(BaseModel):
+    # Capped at notifications.UNREAD_CAP; show it as "99+"
+    unread: int
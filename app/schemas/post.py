@@ -60,4 +60,43 @@ class CommentResponse(BaseModel):
     owner: Userout
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CommentNode(CommentResponse):
+    likes: int = 0
+    replies_count: int = 0
+    replies: list["CommentNode"] = []
+    # Pass to /posts/comments/{id}/replies to continue this branch; null when the
+    # branch was collapsed at the depth limit and should be loaded from the start
+    replies_cursor: str | None = None
+
+    class Config:
+        from_attributes = True
+
+
+CommentNode.model_rebuild()
+
+
+class CommentThreadNode(CommentNode):
+    liked: bool = False
+    replies: list["CommentThreadNode"] = []
+
+    class Config:
+        from_attributes = True
+
+
+CommentThreadNode.model_rebuild()
+
+
+class PostThreadResponse(BaseModel):
+    Post: Postres
+    votes: int
+    comments_count: int
+    voted: bool = False
+    # The first page of the comment tree; continue with /posts/{id}/comments/tree?cursor=
+    comments: list[CommentThreadNode]
+    comments_cursor: str | None = None
+
+    class Config:
+        from_attributes = True
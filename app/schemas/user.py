@@ -63,6 +63,16 @@ class UserProfileResponse(BaseModel):
         from_attributes = True
 
 
+class UserProfileStats(UserProfileResponse):
+    followers_count: int = 0
+    following_count: int = 0
+    posts_count: int = 0
+    is_following: bool = False
+
+    class Config:
+        from_attributes = True
+
+
 class UserProfileUpdate(BaseModel):
     name: str | None = None
     user_name: str | None = None
@@ -74,6 +84,18 @@ class UserProfileUpdate(BaseModel):
         from_attributes = True
 
 
+class Principal(BaseModel):
+    """The authenticated caller, as cached between requests by get_current_user."""
+    id: int
+    name: str
+    user_name: str
+    email: EmailStr
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -89,6 +111,26 @@ class UserFollowInfo(BaseModel):
 
 
 
+class FollowListItem(UserFollowInfo):
+    avatar_url: str | None = None
+    followed_at: datetime
+    # Whether the user viewing the list follows this account
+    is_following: bool = False
+
+
+class UserDirectoryEntry(UserFollowInfo):
+    avatar_url: str | None = None
+    bio: str | None = None
+    followers_count: int
+    created_at: datetime
+
+
+class SuggestedUser(UserFollowInfo):
+    avatar_url: str | None = None
+    # How many accounts the viewer follows also follow this one
+    mutuals: int
+
+
 class UserProfileWithFollows(BaseModel):
     id: int
     name: str
@@ -6,4 +6,10 @@ class vote(BaseModel):
     dir: conint(ge=0, le=1)
 
 
+class VoteResult(BaseModel):
+    message: str
+    voted: bool
+    votes: int
+
+
 
@@ -0,0 +1,64 @@
+"""In-process TTL/LRU caches.
+
+Each worker process keeps its own entries; nothing is shared between workers, so
+anything cached here must tolerate being stale for up to its TTL on other workers.
+Every cache registers itself in ``caches`` so its hit/miss counters can be reported.
+"""
+import time
+from collections import OrderedDict
+
+caches: dict[str, "TTLCache"] = {}
+
+_MISSING = object()
+
+
+class TTLCache:
+    """A bounded mapping whose entries expire `ttl` seconds after they are set.
+
+    Least recently used entries are evicted once `maxsize` is reached. Not thread-safe:
+    it is meant to be used from the event loop of a single worker.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        caches[name] = self
+
+    def get(self, key, default=None):
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl: float | None = None):
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def discard(self, predicate):
+        """Drop every entry whose value matches predicate; a scan of the whole cache."""
+        for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
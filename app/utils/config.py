@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,6 +12,87 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    # Connection pool, per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Connections opened during startup, and how long startup may spend on it
+    DB_POOL_WARMUP: int = 5
+    DB_WARMUP_TIMEOUT: float = 5
+    # bcrypt cost for new hashes; stored hashes with another cost are rehashed on login
+    BCRYPT_ROUNDS: int = 12
+    # Processes (and maximum concurrent hashes) in each worker's password hashing pool
+    HASH_WORKERS: int = 2
+    # Per-worker cache of decoded tokens and authenticated users; other workers may
+    # see a profile update or account deletion up to AUTH_CACHE_TTL seconds late
+    AUTH_CACHE_TTL: float = 30
+    AUTH_CACHE_SIZE: int = 10000
+    # Per-worker cache of public GET responses (post listings, comment trees)
+    RESPONSE_CACHE_TTL: float = 5
+    RESPONSE_CACHE_SIZE: int = 1000
+    # "immediate": votes are committed before the response. "buffered": votes are acknowledged
+    # from memory and written in batches every VOTE_FLUSH_INTERVAL seconds, so a worker that
+    # dies without a clean shutdown loses up to one interval of votes
+    VOTE_WRITE_MODE: Literal["immediate", "buffered"] = "immediate"
+    VOTE_FLUSH_INTERVAL: float = 1.0
+    VOTE_BUFFER_MAX_PENDING: int = 10000
+    # "Who to follow": how many of the viewer's recent follows are sampled, how many of each
+    # of their recent follows are counted, how many scored candidates are kept per viewer,
+    # and for how long
+    SUGGEST_SAMPLE_FOLLOWING: int = 200
+    SUGGEST_SAMPLE_FANOUT: int = 100
+    SUGGEST_CANDIDATES: int = 200
+    SUGGEST_CACHE_TTL: float = 600
+    SUGGEST_CACHE_SIZE: int = 10000
+    # Authors with at least this many followers are merged into /feed at read time
+    # instead of being fanned out to every follower's timeline on write
+    FEED_FANOUT_THRESHOLD: int = 10000
+    # How many recent posts are copied into a timeline when a new follow is made
+    FEED_BACKFILL_POSTS: int = 20
+    # Hot ranking: (votes + HOT_COMMENT_WEIGHT * comments + 1) / (age_hours + 2) ^ HOT_GRAVITY.
+    # Scores of posts younger than HOT_REDECAY_WINDOW_HOURS are re-decayed every
+    # HOT_REDECAY_INTERVAL seconds (0 disables the job), HOT_REDECAY_BATCH rows per transaction
+    HOT_GRAVITY: float = 1.8
+    HOT_COMMENT_WEIGHT: float = 2.0
+    HOT_REDECAY_INTERVAL: float = 300
+    HOT_REDECAY_WINDOW_HOURS: int = 168
+    HOT_REDECAY_BATCH: int = 1000
+
+    # Report per-request SQL counts and time in X-DB-* response headers and log N+1 patterns:
+    # one SQL text run this many times with different parameters in a single request
+    SQL_DEBUG: bool = False
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Notifications are queued in each worker's memory and written every NOTIFY_FLUSH_INTERVAL
+    # seconds (sooner once NOTIFY_MAX_PENDING events wait), so a worker that dies abruptly
+    # loses up to one interval of them. Unread counts are cached per worker for
+    # NOTIFY_UNREAD_CACHE_TTL seconds
+    NOTIFY_FLUSH_INTERVAL: float = 2
+    NOTIFY_MAX_PENDING: int = 10000
+    NOTIFY_UNREAD_CACHE_TTL: float = 10
+    NOTIFY_UNREAD_CACHE_SIZE: int = 10000
+
+    # Read replicas for GET endpoints: comma-separated host or host:port, with the primary's
+    # database name, user and password. A replica more than REPLICA_MAX_LAG seconds behind
+    # (checked every REPLICA_CHECK_INTERVAL seconds) leaves the rotation until it catches up.
+    # A client that wrote in the last READ_YOUR_WRITES_SECONDS reads from the primary
+    DATABASE_REPLICA_HOSTS: str = ""
+    REPLICA_MAX_LAG: float = 5
+    REPLICA_CHECK_INTERVAL: float = 2
+    # A standby that has heard nothing from the primary for this long counts as disconnected;
+    # keep it above half of the primary's wal_sender_timeout, the idle keepalive period
+    REPLICA_MAX_SILENCE: float = 60
+    READ_YOUR_WRITES_SECONDS: float = 5
+
+    # Origins allowed to call the API from a browser, comma-separated ("*" for any). The
+    # frontend sends credentials so the read-your-writes cookie comes back, which only
+    # works for origins listed here
+    CORS_ORIGINS: str = "http://localhost:5173,http://127.0.0.1:5173"
+
+    # How often each worker copies pool, threadpool, cache and queue state into /metrics
+    METRICS_SAMPLE_INTERVAL: float = 5
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,171 @@
+"""Denormalized engagement counters.
+
+Writes bump the stored counters with relative ``col = col + n`` updates in the same
+transaction as the row they describe, so concurrent requests never lose an update.
+``reconcile`` recomputes them from the source tables and is exposed as a command::
+
+    python -m app.utils.counters
+"""
+from sqlalchemy import select, func, update, delete, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+
+
+async def bump(db: AsyncSession, model, id: int, **deltas: int):
+    """Add each delta to the named counter column of one row, without committing."""
+    await db.execute(
+        update(model)
+        .where(model.id == id)
+        .values({getattr(model, col): getattr(model, col) + delta for col, delta in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def toggle(db: AsyncSession, edge, parent, counter: str, parent_key: str, on: bool, **key) -> tuple[bool, int | None]:
+    """Add (on) or remove an edge row such as a vote and adjust the parent's counter, in one statement.
+
+    ``INSERT ... ON CONFLICT DO NOTHING`` / ``DELETE ... RETURNING`` feed a data-modifying
+    CTE that bumps the counter only when a row actually changed, so repeated or concurrent
+    toggles are idempotent. Adding an edge to a missing parent raises IntegrityError from
+    the foreign key. Returns (changed, count); count is None if the parent does not exist.
+    Does not commit.
+    """
+    parent_id = key[parent_key]
+    edge_key = getattr(edge, parent_key)
+    if on:
+        changed = pg_insert(edge).values(**key).on_conflict_do_nothing().returning(edge_key)
+    else:
+        changed = (
+            delete(edge)
+            .where(*(getattr(edge, col) == value for col, value in key.items()))
+            .returning(edge_key)
+        )
+    changed = changed.cte("changed")
+    column = getattr(parent, counter)
+    bumped = (
+        update(parent)
+        .where(parent.id.in_(select(changed.c[parent_key])))
+        .values({column: column + (1 if on else -1)})
+        .returning(column)
+        .cte("bumped")
+    )
+    # The outer SELECT sees the snapshot from before the CTEs ran, hence both columns
+    new_count, old_count = (await db.execute(select(
+        select(bumped.c[counter]).scalar_subquery(),
+        select(column).where(parent.id == parent_id).scalar_subquery(),
+    ))).one()
+    if new_count is not None:
+        return True, new_count
+    return False, old_count
+
+
+def _post_counts():
+    votes = (
+        select(func.count())
+        .where(models.Vote.post_id == models.Post.id)
+        .scalar_subquery()
+    )
+    comments = (
+        select(func.count())
+        .where(models.Comments.post_id == models.Post.id)
+        .scalar_subquery()
+    )
+    return votes, comments
+
+
+def _comment_counts():
+    child = models.Comments.__table__.alias("child")
+    replies = (
+        select(func.count())
+        .where(child.c.parent_id == models.Comments.id)
+        .scalar_subquery()
+    )
+    likes = (
+        select(func.count())
+        .where(models.CommentLike.comment_id == models.Comments.id)
+        .scalar_subquery()
+    )
+    return replies, likes
+
+
+def _user_counts():
+    followers = (
+        select(func.count())
+        .where(models.followers_table.c.followed_id == models.User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count())
+        .where(models.followers_table.c.follower_id == models.User.id)
+        .scalar_subquery()
+    )
+    posts = (
+        select(func.count())
+        .where(models.Post.user_id == models.User.id)
+        .scalar_subquery()
+    )
+    return followers, following, posts
+
+
+async def reconcile(db: AsyncSession, post_ids=None, user_ids=None, comment_ids=None) -> tuple[int, int, int]:
+    """Rewrite any counter that has drifted from the source tables, without committing.
+
+    Passing post_ids / user_ids / comment_ids limits the repair to those rows; by default
+    every row is checked. Returns the number of (posts, users, comments) that were corrected.
+    """
+    votes, comments = _post_counts()
+    post_stmt = (
+        update(models.Post)
+        .where(or_(models.Post.votes_count != votes, models.Post.comments_count != comments))
+        .values(votes_count=votes, comments_count=comments)
+        .execution_options(synchronize_session=False)
+    )
+    if post_ids is not None:
+        post_stmt = post_stmt.where(models.Post.id.in_(post_ids))
+
+    followers, following, posts = _user_counts()
+    user_stmt = (
+        update(models.User)
+        .where(or_(
+            models.User.followers_count != followers,
+            models.User.following_count != following,
+            models.User.posts_count != posts,
+        ))
+        .values(followers_count=followers, following_count=following, posts_count=posts)
+        .execution_options(synchronize_session=False)
+    )
+    if user_ids is not None:
+        user_stmt = user_stmt.where(models.User.id.in_(user_ids))
+
+    replies, likes = _comment_counts()
+    comment_stmt = (
+        update(models.Comments)
+        .where(or_(models.Comments.replies_count != replies, models.Comments.likes_count != likes))
+        .values(replies_count=replies, likes_count=likes)
+        .execution_options(synchronize_session=False)
+    )
+    if comment_ids is not None:
+        comment_stmt = comment_stmt.where(models.Comments.id.in_(comment_ids))
+
+    fixed_posts = (await db.execute(post_stmt)).rowcount
+    fixed_users = (await db.execute(user_stmt)).rowcount
+    fixed_comments = (await db.execute(comment_stmt)).rowcount
+    return fixed_posts, fixed_users, fixed_comments
+
+
+async def main():
+    from .database import SessionLocal, engine
+
+    async with SessionLocal() as db:
+        fixed_posts, fixed_users, fixed_comments = await reconcile(db)
+        await db.commit()
+    await engine.dispose()
+    print(f"Reconciled counters: {fixed_posts} posts, {fixed_users} users, {fixed_comments} comments repaired")
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(main())
@@ -1,41 +1,91 @@
-import time
+import asyncio
+import logging
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from typing_extensions import Generator
+from typing_extensions import AsyncGenerator
 from .config import settings
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.DATABASE_USER}:{settings.DATABASE_PASSWORD}@{settings.DATABASE_HOST}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}"
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+logger = logging.getLogger(__name__)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def database_url(host: str, port: str) -> str:
+    return f"postgresql+asyncpg://{settings.DATABASE_USER}:{settings.DATABASE_PASSWORD}@{host}:{port}/{settings.DATABASE_NAME}"
+
+
+def make_engine(url: str) -> AsyncEngine:
+    """An engine with the configured pool settings; read replicas get the same ones."""
+    return create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+SQLALCHEMY_DATABASE_URL = database_url(settings.DATABASE_HOST, settings.DATABASE_PORT)
+
+# Creating the engine does no I/O; connections are opened on first use or by warm_up_pool
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
+
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) reload.
+# Bound to the primary; SessionLocal(bind=replica_engine) opens the same kind of session on a replica
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-while True:
+async def ping(timeout: float) -> bool:
+    """Return whether the database answers a trivial query within timeout seconds."""
+    async def probe():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
     try:
-        conn = psycopg2.connect(
-            host=settings.DATABASE_HOST,
-            database=settings.DATABASE_NAME,
-            user=settings.DATABASE_USER,
-            password=settings.DATABASE_PASSWORD,
-            cursor_factory=RealDictCursor
-        )
-        cursor = conn.cursor()
-        print("Database connection was successful")
-        break
+        await asyncio.wait_for(probe(), timeout)
+        return True
     except Exception as error:
-        print("Connection to database failed")
-        print("Error: ", error)
-        time.sleep(5)
\ No newline at end of file
+        logger.warning("Database ping failed: %r", error)
+        return False
+
+
+async def warm_up_pool(connections: int, timeout: float):
+    """Open up to `connections` pooled connections in parallel, giving up after timeout.
+
+    Failure is logged rather than raised so a worker still boots (and reports not-ready)
+    while the database is unavailable.
+    """
+    if connections <= 0:
+        return
+    results = await asyncio.gather(*(ping(timeout) for _ in range(connections)))
+    logger.info("Warmed %d/%d database connections", sum(results), connections)
+
+
+async def create_tables():
+    """Create every table from the models on an empty database."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+if __name__ == "__main__":
+    # Bootstrap a fresh database: build the current schema, then mark it as migrated
+    # so `alembic upgrade head` only applies revisions written after today.
+    from alembic import command
+    from alembic.config import Config
+    # Import through the package so the models register on the same Base used here
+    from app.utils import database
+    from app.models import models  # noqa: F401
+
+    async def main():
+        await database.create_tables()
+        await database.engine.dispose()
+
+    asyncio.run(main())
+    command.stamp(Config("alembic.ini"), "head")
+    print("Database tables created and stamped at alembic head")
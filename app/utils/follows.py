@@ -0,0 +1,63 @@
+"""Follow-graph operations on the ``followers`` edge table.
+
+Nothing here loads the ``User.followers`` / ``User.following`` collections: membership
+is a primary-key probe, writes are single conflict-tolerant statements, and counts come
+from the denormalized counters on ``users``.
+"""
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+from . import counters
+
+followers = models.followers_table
+
+
+async def is_following(db: AsyncSession, follower_id: int, followed_id: int) -> bool:
+    edge = await db.scalar(
+        select(followers.c.follower_id)
+        .where(followers.c.follower_id == follower_id, followers.c.followed_id == followed_id)
+    )
+    return edge is not None
+
+
+async def following_among(db: AsyncSession, follower_id: int | None, user_ids) -> set[int]:
+    """Which of user_ids the follower follows, in one index range scan."""
+    user_ids = list(user_ids)
+    if follower_id is None or not user_ids:
+        return set()
+    rows = await db.scalars(
+        select(followers.c.followed_id)
+        .where(followers.c.follower_id == follower_id, followers.c.followed_id.in_(user_ids))
+    )
+    return set(rows.all())
+
+
+async def follow(db: AsyncSession, follower_id: int, followed_id: int) -> bool:
+    """Add the edge and bump both counters; False if it already existed. Does not commit."""
+    added = await db.scalar(
+        pg_insert(followers)
+        .values(follower_id=follower_id, followed_id=followed_id)
+        .on_conflict_do_nothing()
+        .returning(followers.c.followed_id)
+    )
+    if added is None:
+        return False
+    await counters.bump(db, models.User, follower_id, following_count=1)
+    await counters.bump(db, models.User, followed_id, followers_count=1)
+    return True
+
+
+async def unfollow(db: AsyncSession, follower_id: int, followed_id: int) -> bool:
+    """Remove the edge and decrement both counters; False if there was none. Does not commit."""
+    removed = await db.scalar(
+        delete(followers)
+        .where(followers.c.follower_id == follower_id, followers.c.followed_id == followed_id)
+        .returning(followers.c.followed_id)
+    )
+    if removed is None:
+        return False
+    await counters.bump(db, models.User, follower_id, following_count=-1)
+    await counters.bump(db, models.User, followed_id, followers_count=-1)
+    return True
@@ -0,0 +1,95 @@
+"""Password hashing on a dedicated process pool.
+
+bcrypt is deliberately slow and holds the CPU for the whole computation, so running it
+on the event loop or the shared anyio threadpool lets a burst of logins starve every
+other request. Instead each worker owns a small process pool of HASH_WORKERS processes
+and never has more than that many hashes in flight; callers beyond the limit wait on
+a semaphore, and the wait is recorded in ``stats()``. A pool whose process died (the OOM
+killer, a crash in bcrypt) refuses all further work, so it is replaced and the hash
+retried once.
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import utils
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_slots = asyncio.Semaphore(settings.HASH_WORKERS)
+_stats = {"waiting": 0, "running": 0, "completed": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+          "restarts": 0}
+
+
+def start():
+    """Spawn the pool; called from the app lifespan, or lazily on first use."""
+    global _pool
+    if _pool is None:
+        # spawn, not fork: forking a process that already runs an event loop and
+        # driver threads can copy held locks into the children
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info("Started password hashing pool with %d processes", settings.HASH_WORKERS)
+
+
+def _restart(broken: ProcessPoolExecutor):
+    """Replace a broken pool, once however many hashes were running on it."""
+    global _pool
+    if _pool is broken:
+        logger.warning("Password hashing pool broke; starting a new one")
+        _pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        _stats["restarts"] += 1
+    start()
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn, *args):
+    start()
+    queued_at = time.monotonic()
+    _stats["waiting"] += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _stats["waiting"] -= 1
+    waited = time.monotonic() - queued_at
+    _stats["wait_seconds_total"] += waited
+    _stats["wait_seconds_max"] = max(_stats["wait_seconds_max"], waited)
+    _stats["running"] += 1
+    loop = asyncio.get_running_loop()
+    try:
+        pool = _pool
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            _restart(pool)
+            return await loop.run_in_executor(_pool, fn, *args)
+    finally:
+        _stats["running"] -= 1
+        _stats["completed"] += 1
+        _slots.release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(utils.hash_password, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return await _run(utils.verify_and_update_password, plain_password, hashed_password)
+
+
+def stats() -> dict:
+    return {"workers": settings.HASH_WORKERS, **_stats}
@@ -0,0 +1,73 @@
+"""Post listings fetched as plain rows and rendered straight to JSON.
+
+List endpoints used to load ``Post`` objects (plus a joined ``User``) into the session's
+identity map, wrap them in dicts and let FastAPI re-validate every item through
+``PostDetailResponse`` -> ``Postres`` -> ``Userout`` with ``from_attributes``. On a
+50-item page that cost more than the SQL. Here the columns are selected as tuples and
+shaped directly into the documented response structure, then encoded with orjson; the
+``response_model`` on each route still describes the output for OpenAPI.
+
+Compare both paths with ``python -m benchmarks.serialization``.
+"""
+import orjson
+from fastapi import Response
+from sqlalchemy import select
+
+from ..models import models
+from . import vote_buffer
+
+POST_COLUMNS = (
+    models.Post.id,
+    models.Post.title,
+    models.Post.content,
+    models.Post.published,
+    models.Post.created_at,
+    models.Post.user_id,
+    models.Post.votes_count,
+    models.Post.comments_count,
+    models.User.name.label("owner_name"),
+    models.User.user_name.label("owner_user_name"),
+    models.User.email.label("owner_email"),
+)
+
+
+def select_posts(*extra):
+    """A select of POST_COLUMNS (plus any extra columns) with the owner joined in."""
+    return select(*POST_COLUMNS, *extra).join(models.User, models.User.id == models.Post.user_id)
+
+
+def post_detail(row) -> dict:
+    """Shape one POST_COLUMNS row like PostDetailResponse."""
+    id, title, content, published, created_at, user_id, votes, comments_count, name, user_name, email = row[:11]
+    return {
+        "Post": {
+            "id": id,
+            "title": title,
+            "content": content,
+            "published": published,
+            "created_at": created_at,
+            "user_id": user_id,
+            "owner": {"id": user_id, "name": name, "user_name": user_name, "email": email},
+        },
+        "votes": votes + vote_buffer.pending_votes(id),
+        "comments_count": comments_count,
+    }
+
+
+class ORJSONResponse(Response):
+    """JSON encoded with orjson and no validation pass; for payloads already in response_model shape."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return render(content)
+
+
+def render(payload) -> bytes:
+    # OPT_UTC_Z matches pydantic, so timestamps look the same on every endpoint
+    return orjson.dumps(payload, option=orjson.OPT_UTC_Z)
+
+
+def json_response(response: Response, payload) -> ORJSONResponse:
+    """Answer with payload, keeping headers (e.g. X-Next-Cursor) already set on the injected response."""
+    headers = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    return ORJSONResponse(payload, headers=headers)
@@ -0,0 +1,168 @@
+"""Prometheus metrics for every worker, served from ``GET /metrics``.
+
+Requests are measured by a plain ASGI middleware: one in-progress gauge and one
+latency histogram labelled by method, route template (``/posts/{id}``, never the raw
+path, so the label set stays bounded) and status class. Everything else is sampled
+from state the app already keeps, every METRICS_SAMPLE_INTERVAL seconds and again just
+before a scrape: database pool usage, replica lag, the anyio threadpool that runs sync
+endpoints and dependencies, the in-process caches, the password hashing pool, the vote
+buffer and the notification queue.
+
+Multiple workers: start the server with PROMETHEUS_MULTIPROC_DIR pointing at an empty
+directory (wiped before each start). prometheus_client then keeps each worker's values
+in memory-mapped files there and ``/metrics`` on any worker aggregates all of them;
+gauges of exited workers are dropped. Without it, ``/metrics`` reports the worker that
+answered the scrape.
+"""
+import asyncio
+import logging
+import os
+import time
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+from . import hashing, notifications, replicas, vote_buffer
+from .cache import caches
+from .config import settings
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to the end of the response body, by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled", multiprocess_mode="livesum")
+
+POOL_SIZE = Gauge("db_pool_size", "Configured pool size", multiprocess_mode="livesum")
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections in use", multiprocess_mode="livesum")
+POOL_OVERFLOW = Gauge("db_pool_overflow", "Connections open beyond the pool size", multiprocess_mode="livesum")
+REPLICA_LAG = Gauge("db_replica_lag_seconds", "Replication lag at the last check", ["replica"],
+                    multiprocess_mode="livemax")
+REPLICA_IN_ROTATION = Gauge("db_replica_in_rotation", "1 while the replica serves reads", ["replica"],
+                            multiprocess_mode="livemin")
+
+THREADPOOL_CAPACITY = Gauge("threadpool_capacity", "Threads available to sync code", multiprocess_mode="livesum")
+THREADPOOL_IN_USE = Gauge("threadpool_in_use", "Threads busy with sync code", multiprocess_mode="livesum")
+THREADPOOL_WAITING = Gauge("threadpool_waiting", "Tasks queued for a thread", multiprocess_mode="livesum")
+
+CACHE_HITS = Counter("cache_hits", "In-process cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses", "In-process cache misses", ["cache"])
+CACHE_SIZE = Gauge("cache_entries", "Entries held by in-process caches", ["cache"], multiprocess_mode="livesum")
+
+HASH_WAITING = Gauge("password_hash_waiting", "Hashes queued for the hashing pool", multiprocess_mode="livesum")
+HASH_RUNNING = Gauge("password_hash_running", "Hashes running on the hashing pool", multiprocess_mode="livesum")
+VOTES_PENDING = Gauge("vote_buffer_pending", "Buffered votes not yet written", multiprocess_mode="livesum")
+NOTIFICATIONS_PENDING = Gauge("notifications_pending", "Notification events not yet written",
+                              multiprocess_mode="livesum")
+
+# Cache counters are cumulative ints on each TTLCache; the counters advance by the difference
+_last_seen: dict[tuple[str, str], int] = {}
+_task: asyncio.Task | None = None
+
+
+class PrometheusMiddleware:
+    """Time every HTTP request and count those in flight; a few microseconds per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_PROGRESS.dec()
+            # The router records the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, f"{status // 100}xx").observe(time.perf_counter() - started)
+
+
+def _advance(counter, name: str, kind: str, value: int):
+    previous = _last_seen.get((name, kind), 0)
+    if value > previous:
+        counter.labels(name).inc(value - previous)
+    _last_seen[(name, kind)] = value
+
+
+def sample():
+    """Copy this worker's pools, replicas, caches and queues into the metrics."""
+    pool = engine.sync_engine.pool
+    POOL_SIZE.set(pool.size())
+    POOL_CHECKED_OUT.set(pool.checkedout())
+    POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    for replica in replicas.replicas:
+        REPLICA_LAG.labels(replica.name).set(replica.lag if replica.lag is not None else float("nan"))
+        REPLICA_IN_ROTATION.labels(replica.name).set(replica.in_rotation)
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_CAPACITY.set(limiter.total_tokens)
+    THREADPOOL_IN_USE.set(limiter.borrowed_tokens)
+    THREADPOOL_WAITING.set(limiter.statistics().tasks_waiting)
+
+    for name, cache in caches.items():
+        _advance(CACHE_HITS, name, "hits", cache.hits)
+        _advance(CACHE_MISSES, name, "misses", cache.misses)
+        CACHE_SIZE.labels(name).set(len(cache))
+
+    hashes = hashing.stats()
+    HASH_WAITING.set(hashes["waiting"])
+    HASH_RUNNING.set(hashes["running"])
+    VOTES_PENDING.set(vote_buffer.stats()["pending"])
+    NOTIFICATIONS_PENDING.set(notifications.stats()["pending"])
+
+
+def render() -> tuple[bytes, str]:
+    """The exposition text for a scrape, aggregated over every worker in multiprocess mode."""
+    sample()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+async def _run():
+    while True:
+        await asyncio.sleep(settings.METRICS_SAMPLE_INTERVAL)
+        try:
+            sample()
+        except Exception:
+            logger.exception("Sampling metrics failed")
+
+
+def start():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    if MULTIPROCESS:
+        # Drop this worker's live gauges from the aggregate
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,177 @@
+"""Notifications, generated off the request path and coalesced per recipient, kind and target.
+
+Write endpoints call ``notify(kind, target_id, actor_id)`` once their change is committed.
+That only records the event in this worker's memory, keyed by (kind, target, actor), so
+the request pays for a dict assignment; undoing the action before the next flush
+(``retract``: an unvote, unlike or unfollow) drops it again.
+
+Every NOTIFY_FLUSH_INTERVAL seconds (sooner once NOTIFY_MAX_PENDING events wait) the
+queue is written in one statement. It resolves each event's recipient (the post or
+comment owner, or the followed user), drops self-notifications and events whose target
+or actor is gone, groups them per (recipient, kind, target) and upserts the recipient's
+unread row for that key through the partial unique index ix_notifications_unread: "N
+people liked your post" is one row whose actors_count, last actor and updated_at move.
+Once read the row is left alone and the next event opens a new one. actors_count counts
+distinct actors within a flush and adds up across flushes, so someone who votes, unvotes
+and votes again in different intervals is counted twice.
+
+Unread counts stop at UNREAD_CAP, come from an index-only scan of ix_notifications_unread
+and are cached per worker for NOTIFY_UNREAD_CACHE_TTL seconds. The worker that flushes
+or marks read drops the cached counts it changed; other workers catch up within the TTL.
+
+Durability matches the vote buffer: the lifespan flushes on shutdown, but a worker that
+dies abruptly loses up to one interval of notifications. A failed flush keeps its events
+for the next interval.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import func, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+from .cache import TTLCache
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Counts from here on are reported as UNREAD_CAP ("99+" in the UI), so polling never counts more rows
+UNREAD_CAP = 100
+
+unread_cache = TTLCache("notification_unread", settings.NOTIFY_UNREAD_CACHE_SIZE, settings.NOTIFY_UNREAD_CACHE_TTL)
+
+# (kind, target_id, actor_id) -> when it happened
+_pending: dict[tuple[str, int, int], datetime] = {}
+_wake = asyncio.Event()
+_task: asyncio.Task | None = None
+_stopping = False
+
+_FLUSH = text("""
+    WITH events AS (
+        SELECT * FROM unnest(CAST(:kinds AS text[]), CAST(:target_ids AS integer[]),
+                             CAST(:actor_ids AS integer[]), CAST(:ats AS timestamptz[]))
+            AS e(kind, target_id, actor_id, at)
+    ),
+    resolved AS (
+        SELECT e.*,
+               CASE WHEN e.kind = 'follow' THEN followed.id ELSE coalesce(p.user_id, c.user_id) END AS recipient_id,
+               coalesce(p.id, c.post_id) AS post_id
+        FROM events e
+        JOIN users actor ON actor.id = e.actor_id
+        LEFT JOIN post p ON e.kind IN ('vote', 'comment') AND p.id = e.target_id
+        LEFT JOIN comments c ON e.kind IN ('reply', 'comment_like') AND c.id = e.target_id
+        LEFT JOIN users followed ON e.kind = 'follow' AND followed.id = e.target_id
+    ),
+    grouped AS (
+        SELECT recipient_id, kind, target_id, min(post_id) AS post_id,
+               (array_agg(actor_id ORDER BY at DESC))[1] AS last_actor_id,
+               count(DISTINCT actor_id) AS actors_count, min(at) AS first_at, max(at) AS last_at
+        FROM resolved
+        WHERE recipient_id IS NOT NULL AND recipient_id <> actor_id
+        GROUP BY recipient_id, kind, target_id
+    )
+    INSERT INTO notifications (recipient_id, kind, target_id, post_id, last_actor_id, actors_count,
+                               created_at, updated_at)
+    SELECT recipient_id, kind, target_id, post_id, last_actor_id, actors_count, first_at, last_at FROM grouped
+    ON CONFLICT (recipient_id, kind, target_id) WHERE read_at IS NULL DO UPDATE SET
+        actors_count = notifications.actors_count + excluded.actors_count,
+        last_actor_id = excluded.last_actor_id,
+        updated_at = greatest(notifications.updated_at, excluded.updated_at)
+    RETURNING recipient_id
+""")
+
+
+def notify(kind: str, target_id: int, actor_id: int):
+    """Queue an event: vote / comment on a post, reply / comment_like on a comment, follow of a user."""
+    _pending[(kind, target_id, actor_id)] = datetime.now(timezone.utc)
+    if len(_pending) >= settings.NOTIFY_MAX_PENDING:
+        _wake.set()
+
+
+def retract(kind: str, target_id: int, actor_id: int):
+    """Drop a queued event whose action was undone; one already written stays."""
+    _pending.pop((kind, target_id, actor_id), None)
+
+
+async def flush():
+    """Write every queued event."""
+    if not _pending:
+        return
+    batch = dict(_pending)
+    _pending.clear()
+    try:
+        async with SessionLocal() as db:
+            recipients = (await db.scalars(_FLUSH, {
+                "kinds": [kind for kind, _, _ in batch],
+                "target_ids": [target_id for _, target_id, _ in batch],
+                "actor_ids": [actor_id for _, _, actor_id in batch],
+                "ats": list(batch.values()),
+            })).all()
+            await db.commit()
+    except Exception:
+        # Back in the queue, behind anything newer for the same key
+        for key, at in batch.items():
+            _pending.setdefault(key, at)
+        raise
+    for recipient_id in set(recipients):
+        unread_cache.delete(recipient_id)
+    logger.debug("Flushed %d notification events into %d rows", len(batch), len(recipients))
+
+
+def cached_unread(user_id: int) -> int | None:
+    return unread_cache.get(user_id)
+
+
+async def unread_count(db: AsyncSession, user_id: int) -> int:
+    """Unread entries for a user, up to UNREAD_CAP."""
+    unread = (
+        select(literal(1))
+        .where(models.Notification.recipient_id == user_id, models.Notification.read_at.is_(None))
+        .limit(UNREAD_CAP)
+        .subquery()
+    )
+    count = await db.scalar(select(func.count()).select_from(unread))
+    unread_cache.set(user_id, count)
+    return count
+
+
+def forget_unread(user_id: int):
+    unread_cache.delete(user_id)
+
+
+async def _run():
+    while not _stopping:
+        try:
+            await asyncio.wait_for(_wake.wait(), settings.NOTIFY_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await flush()
+        except Exception:
+            logger.exception("Flushing %d notification events failed; retrying next interval", len(_pending))
+
+
+def start():
+    global _task, _stopping
+    if _task is None:
+        _stopping = False
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+    """Stop the flush loop and write whatever is still queued."""
+    global _task, _stopping
+    if _task is not None:
+        _stopping = True
+        _wake.set()
+        await _task
+        _task = None
+    if _pending:
+        await flush()
+
+
+def stats() -> dict:
+    return {"pending": len(_pending)}
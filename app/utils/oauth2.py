@@ -1,16 +1,25 @@
+import time
+
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
 
 
 from ..schemas import token as tk
+from ..schemas import user as user_schema
 from ..models import models
 from . import database
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from .config import settings
+from .cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/login", auto_error=False)
+
+# Decoded tokens keyed by the raw JWT, and principals keyed by user id
+token_cache = TTLCache("auth_tokens", settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
+principal_cache = TTLCache("auth_principals", settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -21,6 +30,9 @@ def create_access_token(data: dict):
 
 
 def verify_access_token(token: str, credentials_exception):
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         id: str = payload.get("user_id")
@@ -29,16 +41,39 @@ def verify_access_token(token: str, credentials_exception):
         token_data = tk.TokenData(id=str(id))
     except JWTError:
         raise credentials_exception
+    # Never serve a token from cache past its own expiry
+    remaining = payload["exp"] - time.time() if "exp" in payload else settings.AUTH_CACHE_TTL
+    token_cache.set(token, token_data, ttl=min(settings.AUTH_CACHE_TTL, remaining))
     return token_data
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     token = verify_access_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == token.id).first()
-    return user
+    user_id = int(token.id)
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await db.get(models.User, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = user_schema.Principal.model_validate(user)
+        principal_cache.set(user_id, principal)
+    return principal
+
+    # return verify_access_token(token, credentials_exception)
+
+
+def invalidate_principal(user_id: int):
+    """Drop a cached principal after the user row changes or is deleted."""
+    principal_cache.delete(user_id)
+
 
-    # return verify_access_token(token, credentials_exception)
\ No newline at end of file
+async def get_current_user_optional(token: str | None = Depends(oauth2_scheme_optional),
+                                    db: AsyncSession = Depends(database.get_db)):
+    """Like get_current_user, but anonymous requests get None instead of a 401."""
+    if token is None:
+        return None
+    return await get_current_user(token, db)
\ No newline at end of file
@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Integer sort keys are ids, stored as int4
+INT_RANGE = range(-2**31, 2**31)
+
+
+def encode_cursor(*values) -> str:
+    """Pack the sort key of the last row on a page into an opaque token."""
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    token = base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode())
+    return token.decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple) -> tuple:
+    """Unpack a token produced by encode_cursor, coercing each value to the given type."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor has the wrong shape")
+        values = tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, raw)
+        )
+        if any(t is int and v not in INT_RANGE for t, v in zip(types, values)):
+            raise ValueError("cursor id out of range")
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def keyset(query, columns, limit: int, skip: int = 0, cursor: str | None = None, types: tuple = (datetime, int),
+           descending: bool = True):
+    """Order a query on columns (newest-first by default) and apply either a cursor or the legacy offset.
+
+    One extra row is fetched so set_next_cursor can tell whether another page exists.
+    """
+    if descending:
+        query = query.order_by(*(c.desc() for c in columns))
+    else:
+        query = query.order_by(*(c.asc() for c in columns))
+    if cursor:
+        after = decode_cursor(cursor, types)
+        query = query.filter(tuple_(*columns) < after if descending else tuple_(*columns) > after)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(max(limit, 0) + 1)
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, key) -> list:
+    """Trim the look-ahead row and expose the cursor for the next page, if any (never for an empty page)."""
+    if len(rows) > limit:
+        rows = rows[:max(limit, 0)]
+        if rows:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows
@@ -0,0 +1,92 @@
+"""Per-request SQL accounting: how many statements ran, how long they took, and N+1 patterns.
+
+Engine event hooks add every statement to the QueryStats of the innermost ``track()``
+block, found through a context variable, so concurrent requests never mix. With
+SQL_DEBUG=true a middleware tracks every request and reports the totals in response
+headers (X-DB-Queries, X-DB-Time-Ms, X-DB-N-Plus-One), and logs a warning for each
+N+1 it sees: the same SQL text run SQL_N_PLUS_ONE_THRESHOLD or more times with
+different parameters in one request, the signature of a lazy load or a query in a loop.
+
+Outside a ``track()`` block the hooks cost one context variable lookup per statement.
+Tests use the same mechanism to hold endpoints to a query budget (see tests/conftest.py).
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERIES_HEADER = "X-DB-Queries"
+TIME_HEADER = "X-DB-Time-Ms"
+N_PLUS_ONE_HEADER = "X-DB-N-Plus-One"
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    # SQL text -> distinct parameter sets it ran with
+    parameters: dict[str, set[str]] = field(default_factory=dict)
+    statements: list[str] = field(default_factory=list)
+
+    def n_plus_one(self, threshold: int | None = None) -> dict[str, int]:
+        """Statements repeated with threshold or more distinct parameter sets, and how often."""
+        threshold = threshold or settings.SQL_N_PLUS_ONE_THRESHOLD
+        return {sql: len(seen) for sql, seen in self.parameters.items() if len(seen) >= threshold}
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track():
+    """Collect the statements run inside the block (in this task and tasks it starts)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.seconds += time.perf_counter() - conn.info["query_started"].pop()
+    stats.count += 1
+    stats.statements.append(statement)
+    stats.parameters.setdefault(statement, set()).add(repr(parameters))
+
+
+def instrument(engine):
+    """Attach the hooks to an engine (sync or async); safe to call more than once."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before):
+        event.listen(sync_engine, "before_cursor_execute", _before)
+        event.listen(sync_engine, "after_cursor_execute", _after)
+
+
+async def middleware(request, call_next):
+    """Report each request's SQL totals in headers and log N+1 patterns; mounted when SQL_DEBUG is on."""
+    with track() as stats:
+        response = await call_next(request)
+    response.headers[QUERIES_HEADER] = str(stats.count)
+    response.headers[TIME_HEADER] = f"{stats.seconds * 1000:.1f}"
+    repeated = stats.n_plus_one()
+    response.headers[N_PLUS_ONE_HEADER] = str(len(repeated))
+    for sql, times in repeated.items():
+        logger.warning("N+1 in %s %s: ran %d times with different parameters: %s",
+                       request.method, request.url.path, times, " ".join(sql.split()))
+    return response
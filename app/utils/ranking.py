@@ -0,0 +1,143 @@
+"""Materialized "hot" scores for ranked post listings.
+
+A post's hot score is its engagement decayed by age::
+
+    (votes + HOT_COMMENT_WEIGHT * comments + 1) / (age_hours + 2) ^ HOT_GRAVITY
+
+Evaluated per row at query time it would force a full scan and sort on every listing,
+so it is stored in ``post.hot_score`` behind ``ix_post_hot_score`` and
+``GET /posts/?Sort=hot`` is a backward range scan of that index. The score is
+rewritten in the same transaction as each write that changes the engagement (new
+post, vote, comment, reply, buffered vote flush); ages move on without any writes, so
+a background job re-decays every post younger than HOT_REDECAY_WINDOW_HOURS every
+HOT_REDECAY_INTERVAL seconds, in batches so it never holds many row locks at once.
+Older posts keep their last score, which is already far below anything recent.
+
+``Sort=top`` ranks by undecayed engagement within a day or a week: a range scan of
+``ix_post_created_at`` over the window and a top-N sort of just those rows.
+
+Run a single re-decay pass by hand with::
+
+    python -m app.utils.ranking
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+from .config import settings
+from .database import engine
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = {"day": timedelta(days=1), "week": timedelta(weeks=1)}
+
+# Arbitrary constant shared by every worker, so only one re-decay pass runs at a time
+_REDECAY_LOCK = 7_300_019
+
+_task: asyncio.Task | None = None
+_stopping = False
+_wake = asyncio.Event()
+
+
+def engagement():
+    """Votes plus weighted comments, the quantity both rankings order by."""
+    return models.Post.votes_count + settings.HOT_COMMENT_WEIGHT * models.Post.comments_count
+
+
+def hot_score():
+    """The SQL expression stored in post.hot_score, evaluated as of now()."""
+    age_hours = func.extract("epoch", func.now() - models.Post.created_at) / 3600
+    return (engagement() + 1) / func.power(func.greatest(age_hours, 0) + 2, settings.HOT_GRAVITY)
+
+
+async def rescore(db: AsyncSession, *post_ids: int):
+    """Recompute the stored score of the given posts, without committing."""
+    await db.execute(
+        update(models.Post)
+        .where(models.Post.id.in_(post_ids))
+        .values(hot_score=hot_score())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def redecay() -> int:
+    """Rewrite the score of every post inside the re-decay window; returns the number of rows.
+
+    Each batch commits on its own. A session-level advisory lock makes a second worker
+    skip the pass instead of repeating it concurrently.
+    """
+    rescored = 0
+    async with engine.connect() as conn:
+        if not await conn.scalar(select(func.pg_try_advisory_lock(_REDECAY_LOCK))):
+            return 0
+        try:
+            await conn.commit()
+            window = timedelta(hours=settings.HOT_REDECAY_WINDOW_HOURS)
+            after = 0
+            while not _stopping:
+                batch = (
+                    select(models.Post.id)
+                    .where(models.Post.created_at >= func.now() - window, models.Post.id > after)
+                    .order_by(models.Post.id)
+                    .limit(settings.HOT_REDECAY_BATCH)
+                )
+                ids = (await conn.scalars(
+                    update(models.Post)
+                    .where(models.Post.id.in_(batch.scalar_subquery()))
+                    .values(hot_score=hot_score())
+                    .returning(models.Post.id)
+                )).all()
+                await conn.commit()
+                if not ids:
+                    break
+                rescored += len(ids)
+                after = max(ids)
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(_REDECAY_LOCK)))
+            await conn.commit()
+    return rescored
+
+
+async def _run():
+    while not _stopping:
+        try:
+            await asyncio.wait_for(_wake.wait(), settings.HOT_REDECAY_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        if _stopping:
+            break
+        try:
+            logger.debug("Re-decayed %d hot scores", await redecay())
+        except Exception:
+            logger.exception("Re-decaying hot scores failed; retrying next interval")
+
+
+def start():
+    global _task, _stopping
+    if settings.HOT_REDECAY_INTERVAL > 0 and _task is None:
+        _stopping = False
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+    """Stop the re-decay loop after the batch in flight, if any."""
+    global _task, _stopping
+    if _task is not None:
+        _stopping = True
+        _wake.set()
+        await _task
+        _task = None
+
+
+async def main():
+    rescored = await redecay()
+    await engine.dispose()
+    print(f"Re-decayed {rescored} hot scores")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
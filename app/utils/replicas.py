@@ -0,0 +1,199 @@
+"""Read replicas for GET endpoints, with read-your-writes and lag-based eviction.
+
+Routes that only read take their session from ``get_read_db`` instead of ``get_db``.
+It picks the next replica in rotation (round robin), or the primary when none is
+configured, none is healthy, or the client has just written:
+
+- Read-your-writes: every successful write request (any method but GET, HEAD and
+  OPTIONS) sets a cookie holding the time until which that client's reads go to the
+  primary, READ_YOUR_WRITES_SECONDS ahead. The cookie only ever routes to the primary,
+  so a forged one cannot expose anything. Clients that do not keep cookies get replica
+  reads straight away.
+- Lag: each worker asks every replica how far it is behind every REPLICA_CHECK_INTERVAL
+  seconds. A replica that is behind by more than REPLICA_MAX_LAG, that is not streaming
+  WAL from the primary, or that does not answer, leaves the rotation until a later check
+  passes. A replica that cannot be
+  connected to when a request opens its session is dropped at once and the request
+  reads from the primary.
+
+Two local Postgres instances are enough to try it: a streaming standby made with
+``pg_basebackup -R`` on another port, listed in DATABASE_REPLICA_HOSTS.
+"""
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from typing_extensions import AsyncGenerator
+
+from . import database
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Seconds since the last replayed transaction, or 0 when everything received has been
+# replayed (an idle primary writes nothing, so the timestamp alone would look stale).
+# A server that is not in recovery is a copy kept in sync some other way: no lag.
+# NULL when the standby is not streaming from the primary: with its WAL receiver gone,
+# or silent for longer than REPLICA_MAX_SILENCE, nothing new arrives and the received and
+# replayed positions stay equal however far behind it falls. Roles without
+# pg_read_all_stats only see whether a receiver runs, not its status or last message.
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver
+            WHERE coalesce(status, 'streaming') = 'streaming'
+              AND coalesce(last_msg_receipt_time, now()) > now() - make_interval(secs => CAST(:silence AS float8))
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: AsyncEngine
+    # Seconds behind the primary at the last check; None when it did not answer
+    lag: float | None = None
+    in_rotation: bool = False
+
+
+def _parse(hosts: str) -> list[tuple[str, str]]:
+    addresses = []
+    for address in filter(None, (part.strip() for part in hosts.split(","))):
+        host, _, port = address.partition(":")
+        addresses.append((host, port or settings.DATABASE_PORT))
+    return addresses
+
+
+replicas: list[Replica] = [
+    Replica(f"{host}:{port}", database.make_engine(database.database_url(host, port)))
+    for host, port in _parse(settings.DATABASE_REPLICA_HOSTS)
+]
+
+_turn = itertools.count()
+_task: asyncio.Task | None = None
+
+
+def pinned(request: Request) -> bool:
+    """Whether the client wrote recently enough that it must read from the primary."""
+    try:
+        return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def choose(request: Request) -> Replica | None:
+    """The replica for this read, or None for the primary."""
+    if not replicas or pinned(request):
+        return None
+    live = [replica for replica in replicas if replica.in_rotation]
+    if not live:
+        return None
+    return live[next(_turn) % len(live)]
+
+
+def _evict(replica: Replica, reason):
+    if replica.in_rotation:
+        logger.warning("Replica %s out of rotation: %s", replica.name, reason)
+    replica.in_rotation = False
+
+
+@asynccontextmanager
+async def read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """A session for reads on a replica in rotation, falling back to the primary."""
+    replica = choose(request)
+    if replica is not None:
+        db = database.SessionLocal(bind=replica.engine)
+        try:
+            # Connect up front, while the request can still move to the primary
+            await db.connection()
+        except (OSError, DBAPIError) as error:
+            await db.close()
+            _evict(replica, repr(error))
+        else:
+            async with db:
+                yield db
+            return
+    async with database.SessionLocal() as db:
+        yield db
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with read_session(request) as db:
+        yield db
+
+
+async def middleware(request: Request, call_next):
+    """Pin a client that has just written to the primary; mounted when replicas are configured."""
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        window = settings.READ_YOUR_WRITES_SECONDS
+        response.set_cookie(PIN_COOKIE, f"{time.time() + window:.3f}", max_age=math.ceil(window),
+                            httponly=True, samesite="lax")
+    return response
+
+
+async def check(replica: Replica):
+    """Measure one replica's lag and put it in or out of rotation."""
+    async def measure():
+        async with replica.engine.connect() as conn:
+            return await conn.scalar(LAG_SQL, {"silence": settings.REPLICA_MAX_SILENCE})
+    try:
+        lag = await asyncio.wait_for(measure(), settings.REPLICA_CHECK_INTERVAL)
+    except Exception as error:
+        replica.lag = None
+        _evict(replica, f"check failed: {error!r}")
+        return
+    if lag is None:
+        replica.lag = None
+        _evict(replica, "not streaming from the primary")
+        return
+    replica.lag = float(lag)
+    if replica.lag > settings.REPLICA_MAX_LAG:
+        _evict(replica, f"{replica.lag:.1f}s behind")
+    elif not replica.in_rotation:
+        logger.info("Replica %s in rotation, %.1fs behind", replica.name, replica.lag)
+        replica.in_rotation = True
+
+
+def stats() -> list[dict]:
+    return [{"replica": r.name, "lag": r.lag, "in_rotation": r.in_rotation} for r in replicas]
+
+
+async def _run():
+    while True:
+        await asyncio.gather(*(check(replica) for replica in replicas))
+        await asyncio.sleep(settings.REPLICA_CHECK_INTERVAL)
+
+
+def start():
+    global _task
+    if replicas and _task is None:
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    for replica in replicas:
+        await replica.engine.dispose()
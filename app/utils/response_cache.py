@@ -0,0 +1,124 @@
+"""Cached, conditional responses for public GET endpoints.
+
+A handler checks ``lookup`` first and, on a miss, builds its payload and hands it to
+``store`` with tags naming what the payload shows: the post listings, one author's
+posts, or one post's comment thread. Entries are the serialized JSON body plus its
+``ETag`` and ``Last-Modified``, keyed on path and query string, and are dropped after
+RESPONSE_CACHE_TTL seconds, or as soon as this worker commits a write that adds, edits
+or removes what they show (``invalidate`` with the matching tags). Counters are left to
+the TTL: a vote or a comment does not drop the listings showing its post, so their
+counts and hot/top order lag by up to RESPONSE_CACHE_TTL. Workers do not share entries,
+so another worker's entries may lag any write by up to the TTL.
+
+A client pinned to the primary after a write (see ``replicas``) always misses: an entry
+may have been filled from a replica that has not replayed that write yet. What it reads
+from the primary is stored as usual.
+
+Clients are told to revalidate (``Cache-Control: no-cache``); a matching
+``If-None-Match`` or ``If-Modified-Since`` gets an empty 304.
+"""
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+from . import replicas
+from .cache import TTLCache
+from .config import settings
+
+responses = TTLCache("responses", settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+
+# Response headers worth replaying from the cache, e.g. X-Next-Cursor
+_VARYING_HEADERS = ("x-next-cursor",)
+
+# GET /posts/ in every sort, window and search
+LISTINGS = "listings"
+
+
+def author(user_id: int) -> str:
+    """Tag of one author's post listing."""
+    return f"author:{user_id}"
+
+
+def thread(post_id: int) -> str:
+    """Tag of one post's comment tree and reply pages."""
+    return f"thread:{post_id}"
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    last_modified: datetime
+    headers: dict
+    tags: frozenset = frozenset()
+
+
+def _key(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}"
+
+
+def _not_modified(request: Request, entry: CachedResponse) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        return if_none_match.strip() == "*" or entry.etag in (tag.strip() for tag in if_none_match.split(","))
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return entry.last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _respond(request: Request, entry: CachedResponse) -> Response:
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+        **entry.headers,
+    }
+    if _not_modified(request, entry):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def lookup(request: Request) -> Response | None:
+    """The cached response for this request (200 or 304), or None on a miss."""
+    if replicas.replicas and replicas.pinned(request):
+        return None
+    entry = responses.get(_key(request))
+    if entry is None:
+        return None
+    return _respond(request, entry)
+
+
+def store(request: Request, response: Response, body: bytes, tags: tuple[str, ...] = ()) -> Response:
+    """Cache an encoded JSON body with the headers already set on response, and answer."""
+    entry = CachedResponse(
+        body=body,
+        etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+        # HTTP dates have one-second resolution
+        last_modified=datetime.now(timezone.utc).replace(microsecond=0),
+        headers={name: response.headers[name] for name in _VARYING_HEADERS if name in response.headers},
+        tags=frozenset(tags),
+    )
+    responses.set(_key(request), entry)
+    return _respond(request, entry)
+
+
+def invalidate(*tags: str):
+    """Forget the responses carrying any of tags, or every response when none are given.
+
+    Call after committing a write: a new, edited or deleted post drops LISTINGS and its
+    author's listing, a comment drops its post's thread, and a profile change drops
+    everything since owner names appear in all of them.
+    """
+    if not tags:
+        responses.clear()
+        return
+    wanted = set(tags)
+    responses.discard(lambda entry: not wanted.isdisjoint(entry.tags))
@@ -0,0 +1,105 @@
+"""Friends-of-friends "who to follow" suggestions.
+
+A candidate's score is the number of accounts the viewer follows that also follow it.
+The exact answer is a two-hop join whose size is the sum of the followees' out-degrees,
+which explodes for active users and celebrity followees, so both hops are sampled:
+the viewer's SUGGEST_SAMPLE_FOLLOWING most recent follows, and for each of those its
+SUGGEST_SAMPLE_FANOUT most recent follows. Each hop is a range scan on
+ix_followers_follower_id_created_at, so the work is bounded by their product no matter
+how the graph looks.
+
+Scores are cached per viewer (per worker) for SUGGEST_CACHE_TTL seconds. The viewer's
+own follows and unfollows adjust a cached entry in place; edges changed by others are
+picked up on the next refresh. Already-followed accounts are filtered at read time,
+so a follow made on another worker never shows up as a suggestion.
+"""
+from sqlalchemy import select, func, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+from . import follows
+from .cache import TTLCache
+from .config import settings
+
+followers = models.followers_table
+
+scores = TTLCache("suggestions", settings.SUGGEST_CACHE_SIZE, settings.SUGGEST_CACHE_TTL)
+
+
+def _recent_follows(follower_id, limit: int):
+    return (
+        select(followers.c.followed_id)
+        .where(followers.c.follower_id == follower_id)
+        .order_by(followers.c.created_at.desc(), followers.c.followed_id.desc())
+        .limit(limit)
+    )
+
+
+def candidates_query(viewer_id: int, keep: int):
+    """Sampled two-hop candidates of viewer_id with their mutual counts, best first."""
+    mine = _recent_follows(viewer_id, settings.SUGGEST_SAMPLE_FOLLOWING).subquery("mine")
+    hop = _recent_follows(mine.c.followed_id, settings.SUGGEST_SAMPLE_FANOUT).lateral("hop")
+    already = (
+        select(followers.c.followed_id)
+        .where(followers.c.follower_id == viewer_id, followers.c.followed_id == hop.c.followed_id)
+        .exists()
+    )
+    mutuals = func.count().label("mutuals")
+    return (
+        select(hop.c.followed_id, mutuals)
+        .select_from(mine)
+        .join(hop, true())
+        .where(hop.c.followed_id != viewer_id, ~already)
+        .group_by(hop.c.followed_id)
+        .order_by(mutuals.desc(), hop.c.followed_id)
+        .limit(keep)
+    )
+
+
+async def _scores(db: AsyncSession, viewer_id: int) -> dict[int, int]:
+    cached = scores.get(viewer_id)
+    if cached is None:
+        rows = await db.execute(candidates_query(viewer_id, settings.SUGGEST_CANDIDATES))
+        cached = {user_id: mutuals for user_id, mutuals in rows.all()}
+        scores.set(viewer_id, cached)
+    return cached
+
+
+async def suggest(db: AsyncSession, viewer_id: int, limit: int) -> list[tuple[int, int]]:
+    """Up to limit (user_id, mutuals) pairs, highest mutuals first."""
+    ranked = sorted((await _scores(db, viewer_id)).items(), key=lambda item: (-item[1], item[0]))
+    # Over-fetch a little: follows made on other workers may not be reflected in the cache yet
+    page = ranked[:limit * 2]
+    followed = await follows.following_among(db, viewer_id, [user_id for user_id, _ in page])
+    return [(user_id, mutuals) for user_id, mutuals in page if user_id not in followed][:limit]
+
+
+async def _adjust(db: AsyncSession, viewer_id: int, via_id: int, delta: int):
+    cached = scores.get(viewer_id)
+    if cached is None:
+        return
+    user_ids = (await db.scalars(_recent_follows(via_id, settings.SUGGEST_SAMPLE_FANOUT))).all()
+    skip = {viewer_id}
+    if delta > 0:
+        skip |= await follows.following_among(db, viewer_id, user_ids)
+    for user_id in user_ids:
+        if user_id in skip:
+            continue
+        mutuals = cached.get(user_id, 0) + delta
+        if mutuals > 0:
+            cached[user_id] = mutuals
+        else:
+            cached.pop(user_id, None)
+
+
+async def on_follow(db: AsyncSession, viewer_id: int, followed_id: int):
+    """The viewer now follows followed_id: drop it as a candidate and credit its follows."""
+    cached = scores.get(viewer_id)
+    if cached is not None:
+        cached.pop(followed_id, None)
+    await _adjust(db, viewer_id, followed_id, 1)
+
+
+async def on_unfollow(db: AsyncSession, viewer_id: int, followed_id: int):
+    """The viewer no longer follows followed_id: withdraw the credit its follows received."""
+    await _adjust(db, viewer_id, followed_id, -1)
@@ -0,0 +1,99 @@
+"""Fan-out-on-write home timelines.
+
+Posts by ordinary authors are copied into each follower's ``timeline`` rows in the
+same transaction as the post. Authors at or above ``FEED_FANOUT_THRESHOLD`` followers
+are skipped on write and merged in when the feed is read, so one post from a large
+account never turns into millions of inserts.
+"""
+from sqlalchemy import select, insert, delete, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import models
+from .config import settings
+from .pagination import keyset
+from . import listing
+
+followers = models.followers_table
+
+
+async def fan_out(db: AsyncSession, post: models.Post):
+    """Push a freshly flushed post into the timelines of the author's followers."""
+    # The threshold is checked against the stored counter in SQL, since the caller
+    # only holds a cached principal for the author
+    await db.execute(
+        insert(models.Timeline).from_select(
+            ["user_id", "post_id", "author_id", "created_at"],
+            select(followers.c.follower_id, models.Post.id, models.Post.user_id, models.Post.created_at)
+            .join(models.User, models.User.id == models.Post.user_id)
+            .where(
+                followers.c.followed_id == models.Post.user_id,
+                models.Post.id == post.id,
+                models.User.followers_count < settings.FEED_FANOUT_THRESHOLD,
+            )
+        )
+    )
+
+
+async def backfill(db: AsyncSession, user_id: int, author: models.User):
+    """Seed a new follower's timeline with the author's most recent posts."""
+    if author.followers_count >= settings.FEED_FANOUT_THRESHOLD:
+        return
+    recent = (
+        select(models.Post.id, models.Post.user_id, models.Post.created_at)
+        .where(models.Post.user_id == author.id)
+        .order_by(models.Post.created_at.desc(), models.Post.id.desc())
+        .limit(settings.FEED_BACKFILL_POSTS)
+        .subquery()
+    )
+    await db.execute(
+        pg_insert(models.Timeline).from_select(
+            ["user_id", "post_id", "author_id", "created_at"],
+            select(literal(user_id), recent.c.id, recent.c.user_id, recent.c.created_at)
+        ).on_conflict_do_nothing()
+    )
+
+
+async def retract(db: AsyncSession, user_id: int, author_id: int):
+    """Drop an author's posts from one reader's timeline, e.g. after an unfollow."""
+    await db.execute(
+        delete(models.Timeline)
+        .where(models.Timeline.user_id == user_id, models.Timeline.author_id == author_id)
+    )
+
+
+def feed_query(user_id: int, limit: int, skip: int = 0, cursor: str | None = None):
+    """Build the page statement for a reader's feed, newest first.
+
+    Each source is a range scan on its own index, cut down to a single page before the
+    two are merged: the reader's materialized timeline, and the recent posts of any
+    followed authors above the fan-out threshold.
+    """
+    materialized = keyset(
+        select(models.Timeline.post_id, models.Timeline.created_at)
+        .where(models.Timeline.user_id == user_id),
+        (models.Timeline.created_at, models.Timeline.post_id), limit + skip, cursor=cursor,
+    ).subquery()
+
+    celebrities = (
+        select(followers.c.followed_id)
+        .join(models.User, models.User.id == followers.c.followed_id)
+        .where(
+            followers.c.follower_id == user_id,
+            models.User.followers_count >= settings.FEED_FANOUT_THRESHOLD,
+        )
+    )
+    merged_at_read = keyset(
+        select(models.Post.id.label("post_id"), models.Post.created_at)
+        .where(models.Post.user_id.in_(celebrities)),
+        (models.Post.created_at, models.Post.id), limit + skip, cursor=cursor,
+    ).subquery()
+
+    # UNION (not ALL) so a post fanned out before its author crossed the threshold shows once
+    entries = (
+        select(materialized.c.post_id, materialized.c.created_at)
+        .union(select(merged_at_read.c.post_id, merged_at_read.c.created_at))
+        .subquery()
+    )
+    query = listing.select_posts().join(entries, entries.c.post_id == models.Post.id)
+    return keyset(query, (entries.c.created_at, entries.c.post_id), limit, skip, cursor)
@@ -1,8 +1,23 @@
 from passlib.context import CryptContext
-pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+
+from .config import settings
+
+# Pinning min/max to the configured cost makes verify_and_update flag every hash
+# made with different parameters, so logins transparently upgrade (or downgrade) it
+pwd_context = CryptContext(
+    schemes=["bcrypt_sha256"],
+    deprecated="auto",
+    bcrypt_sha256__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt_sha256__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt_sha256__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """Verify a password; on success also return a fresh hash if the stored one is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
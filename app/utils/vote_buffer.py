@@ -0,0 +1,175 @@
+"""Write-behind buffering of votes, for posts that draw votes faster than one row can absorb them.
+
+With VOTE_WRITE_MODE=buffered, POST /vote/ only records the caller's desired state in
+this worker's memory, keyed by (post_id, user_id); toggling back and forth within a
+window nets out to a single change. Every VOTE_FLUSH_INTERVAL seconds (sooner once
+VOTE_BUFFER_MAX_PENDING keys are waiting) the buffer is written in one transaction:
+one batched INSERT ... ON CONFLICT DO NOTHING, one batched DELETE, and a single
+counter UPDATE per post built from the rows those statements actually changed,
+followed by one hot score refresh of the touched posts.
+
+Reads add the unflushed deltas (``pending_votes``, ``voted``), so a voter sees their
+own vote at once. Those estimates are per worker, and a vote made on another worker
+shows up after that worker flushes.
+
+Durability: a buffered vote is acknowledged before it is stored. The lifespan flushes
+on shutdown, but a worker that dies abruptly loses up to one interval of votes.
+Failed flushes keep their entries and retry on the next interval.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from . import ranking
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    stored: bool   # whether the vote row existed when the key entered the buffer (or at the last flush)
+    desired: bool  # the caller's latest request
+
+
+_pending: dict[tuple[int, int], _Entry] = {}
+_delta: dict[int, int] = {}
+_wake = asyncio.Event()
+_task: asyncio.Task | None = None
+_stopping = False
+
+_FLUSH = text("""
+    WITH wanted AS (
+        SELECT * FROM unnest(CAST(:post_ids AS integer[]), CAST(:user_ids AS integer[]), CAST(:states AS boolean[]))
+            AS w(post_id, user_id, state)
+    ),
+    added AS (
+        INSERT INTO votes (post_id, user_id)
+        -- Skip posts and users deleted since the vote, so one stale key cannot fail the batch
+        SELECT w.post_id, w.user_id FROM wanted w
+        JOIN post ON post.id = w.post_id
+        JOIN users ON users.id = w.user_id
+        WHERE w.state
+        ON CONFLICT DO NOTHING
+        RETURNING post_id
+    ),
+    removed AS (
+        DELETE FROM votes v USING wanted w
+        WHERE NOT w.state AND v.post_id = w.post_id AND v.user_id = w.user_id
+        RETURNING v.post_id
+    ),
+    changes AS (
+        SELECT post_id, sum(n) AS n
+        FROM (SELECT post_id, 1 AS n FROM added UNION ALL SELECT post_id, -1 FROM removed) AS c
+        GROUP BY post_id
+    )
+    UPDATE post SET votes_count = post.votes_count + changes.n
+    FROM changes
+    WHERE post.id = changes.post_id AND changes.n <> 0
+""")
+
+
+def enabled() -> bool:
+    return settings.VOTE_WRITE_MODE == "buffered"
+
+
+def record(post_id: int, user_id: int, on: bool, stored: bool) -> bool:
+    """Buffer a vote; `stored` is whether the row exists in the database. Returns whether the state changed."""
+    key = (post_id, user_id)
+    entry = _pending.get(key) or _Entry(stored=stored, desired=stored)
+    if entry.desired == on:
+        return False
+    _pending[key] = _Entry(stored=entry.stored, desired=on)
+    remaining = _delta.get(post_id, 0) + (1 if on else -1)
+    if remaining:
+        _delta[post_id] = remaining
+    else:
+        _delta.pop(post_id, None)
+    if len(_pending) >= settings.VOTE_BUFFER_MAX_PENDING:
+        _wake.set()
+    return True
+
+
+def pending_votes(post_id: int) -> int:
+    """Net votes on a post that are buffered here but not yet written."""
+    return _delta.get(post_id, 0)
+
+
+def voted(post_id: int, user_id: int | None, stored: bool) -> bool:
+    """A user's vote state including anything still buffered."""
+    entry = _pending.get((post_id, user_id))
+    return stored if entry is None else entry.desired
+
+
+async def flush():
+    """Write every buffered change that differs from what was stored."""
+    batch = {key: entry for key, entry in _pending.items() if entry.desired != entry.stored}
+    for key, entry in list(_pending.items()):
+        if entry.desired == entry.stored:
+            del _pending[key]
+    if not batch:
+        return
+    async with SessionLocal() as db:
+        await db.execute(_FLUSH, {
+            "post_ids": [post_id for post_id, _ in batch],
+            "user_ids": [user_id for _, user_id in batch],
+            "states": [entry.desired for entry in batch.values()],
+        })
+        await ranking.rescore(db, *{post_id for post_id, _ in batch})
+        await db.commit()
+    # Entries toggled again while the batch was in flight stay buffered, relative to what was just written
+    for key, written in batch.items():
+        post_id = key[0]
+        remaining = _delta.get(post_id, 0) - (int(written.desired) - int(written.stored))
+        if remaining:
+            _delta[post_id] = remaining
+        else:
+            _delta.pop(post_id, None)
+        current = _pending.get(key)
+        if current is written or current is None:
+            _pending.pop(key, None)
+        elif current.desired == written.desired:
+            del _pending[key]
+        else:
+            _pending[key] = _Entry(stored=written.desired, desired=current.desired)
+    logger.debug("Flushed %d buffered votes", len(batch))
+
+
+async def _run():
+    while not _stopping:
+        try:
+            await asyncio.wait_for(_wake.wait(), settings.VOTE_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await flush()
+        except Exception:
+            logger.exception("Flushing %d buffered votes failed; retrying next interval", len(_pending))
+
+
+def start():
+    global _task, _stopping
+    if enabled() and _task is None:
+        _stopping = False
+        _task = asyncio.create_task(_run())
+
+
+async def stop():
+    """Stop the flush loop and write whatever is still buffered."""
+    global _task, _stopping
+    if _task is not None:
+        # Let an in-flight flush finish rather than cancelling it between commit and bookkeeping
+        _stopping = True
+        _wake.set()
+        await _task
+        _task = None
+    if _pending:
+        await flush()
+
+
+def stats() -> dict:
+    return {"mode": settings.VOTE_WRITE_MODE, "pending": len(_pending), "posts": len(_delta)}
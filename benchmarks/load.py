@@ -0,0 +1,92 @@
+"""Closed-loop HTTP load generator for comparing two builds of the API.
+
+Each of --concurrency workers keeps exactly one request in flight for --duration
+seconds. Point it at one or more running servers and it prints throughput and
+latency percentiles per target, e.g. to compare the sync build against the async one:
+
+    git worktree add ../horizon-sync <sync-commit>
+    (cd ../horizon-sync && uvicorn app.main:app --port 8001 --workers 1) &
+    uvicorn app.main:app --port 8000 --workers 1 &
+    python -m benchmarks.load --path /posts/ --concurrency 500 \\
+        sync=http://localhost:8001 async=http://localhost:8000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(base_url: str, path: str, concurrency: int, duration: float, token: str | None,
+              form: dict | None = None) -> dict:
+    """Drive one endpoint; with a form body the requests are form-encoded POSTs instead of GETs."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if form is None:
+                        response = await client.get(path)
+                    else:
+                        response = await client.post(path, data=form)
+                    ok = response.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="+", help="label=base_url, e.g. async=http://localhost:8000")
+    parser.add_argument("--path", default="/posts/")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--token", help="bearer token for authenticated routes such as /feed")
+    parser.add_argument("--form", action="append", metavar="KEY=VALUE",
+                        help="POST this form field instead of issuing GETs; repeatable")
+    args = parser.parse_args()
+    form = dict(field.partition("=")[::2] for field in args.form) if args.form else None
+
+    print(f"{'GET' if form is None else 'POST'} {args.path}  concurrency={args.concurrency}  duration={args.duration:.0f}s")
+    print(f"{'target':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for target in args.targets:
+        label, _, url = target.partition("=")
+        result = asyncio.run(run(url or label, args.path, args.concurrency, args.duration, args.token, form))
+        print(f"{label:<12}{result['rps']:>10.1f}{result['p50']:>10.1f}{result['p95']:>10.1f}"
+              f"{result['p99']:>10.1f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
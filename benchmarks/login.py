@@ -0,0 +1,45 @@
+"""Login under concurrent load, and what it does to everything else.
+
+Runs two closed loops against one server at the same time: --concurrency clients
+hammering POST /login, and --readers clients reading GET /posts/. The read latency is
+the point: with bcrypt on the shared threadpool it climbs with the login load, with
+the dedicated hashing pool it should stay close to an idle server's.
+
+    python -m benchmarks.load --path /posts/ --concurrency 20 idle=http://localhost:8000
+    python -m benchmarks.login --username alice --password secret http://localhost:8000
+
+Check /health/hashing afterwards for the pool's queue wait.
+"""
+import argparse
+import asyncio
+
+from .load import run
+
+
+async def scenario(url: str, args) -> tuple[dict, dict]:
+    form = {"username": args.username, "password": args.password}
+    return await asyncio.gather(
+        run(url, "/login", args.concurrency, args.duration, None, form),
+        run(url, "/posts/", args.readers, args.duration, None),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", help="base url of the server, e.g. http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent login clients")
+    parser.add_argument("--readers", type=int, default=20, help="concurrent GET /posts/ clients")
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+
+    logins, reads = asyncio.run(scenario(args.url, args))
+    print(f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for label, result in (("POST /login", logins), ("GET /posts/", reads)):
+        print(f"{label:<16}{result['rps']:>10.1f}{result['p50']:>10.1f}{result['p95']:>10.1f}"
+              f"{result['p99']:>10.1f}{result['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Scripted mixed workload against a running server, reported per endpoint.
+
+Needs the data from ``python -m benchmarks.seed`` in the database the server uses
+(the same .env). --concurrency virtual users each keep one request in flight for
+--duration seconds, picking a scenario by weight every time:
+
+    posts      GET /posts/ newest first
+    hot        GET /posts/?Sort=hot
+    feed       GET /feed as a reader
+    profile    GET /profile/{id} of a Zipfian account
+    thread     GET /posts/{id}/comments/tree on a busy post
+    vote       POST /vote/ toggling a Zipfian post
+    login      POST /login
+
+Throughput and p50/p95/p99 latency are printed per endpoint. Save a run and compare
+the next one against it to see what a change did:
+
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.scenarios http://localhost:8000 --save before.json
+    # ... apply the change, restart the server ...
+    python -m benchmarks.scenarios http://localhost:8000 --baseline before.json
+
+Votes are real writes; they toggle, so repeated runs leave the counts roughly where
+they were.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+from sqlalchemy import select
+
+from app.models import models
+from app.utils.database import SessionLocal, engine
+from .load import percentile
+from .seed import BENCH_PASSWORD, PREFIX_PATTERN
+
+WEIGHTS = {"posts": 20, "hot": 10, "feed": 25, "profile": 15, "thread": 15, "vote": 12, "login": 3}
+
+
+class Context:
+    """Ids the scenarios draw from, read once from the seeded data, plus reader tokens."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.users: list[int] = []
+        self.readers: list[str] = []
+        self.posts: list[int] = []
+        self.threads: list[int] = []
+        self.tokens: list[str] = []
+
+    async def load(self, client: httpx.AsyncClient, sessions: int, readers: int):
+        bench = models.User.user_name.like(PREFIX_PATTERN)
+        async with SessionLocal() as db:
+            # Busiest first, so a Zipfian draw over the list favours popular accounts and posts
+            self.users = (await db.scalars(
+                select(models.User.id).where(bench).order_by(models.User.followers_count.desc()).limit(10000)
+            )).all()
+            self.readers = (await db.scalars(
+                select(models.User.user_name).where(bench).order_by(models.User.id).limit(readers)
+            )).all()
+            self.posts = (await db.scalars(
+                select(models.Post.id).join(models.User).where(bench)
+                .order_by(models.Post.votes_count.desc()).limit(10000)
+            )).all()
+            self.threads = (await db.scalars(
+                select(models.Post.id).join(models.User).where(bench)
+                .order_by(models.Post.comments_count.desc()).limit(1000)
+            )).all()
+        await engine.dispose()
+        if not self.posts:
+            raise SystemExit("No benchmark data found; run python -m benchmarks.seed first")
+        for username in self.readers[:sessions]:
+            response = await client.post("/login", data={"username": username, "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            self.tokens.append(response.json()["access_token"])
+
+    def popular(self, ids: list):
+        # Roughly Zipfian over a list sorted by popularity
+        return ids[min(len(ids) - 1, int(len(ids) ** self.rng.random()) - 1)]
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens)}"}
+
+
+async def posts(client, ctx):
+    return await client.get("/posts/", params={"Limit": 20})
+
+
+async def hot(client, ctx):
+    return await client.get("/posts/", params={"Limit": 20, "Sort": "hot"})
+
+
+async def feed(client, ctx):
+    return await client.get("/feed", params={"Limit": 20}, headers=ctx.auth())
+
+
+async def profile(client, ctx):
+    return await client.get(f"/profile/{ctx.popular(ctx.users)}", headers=ctx.auth())
+
+
+async def thread(client, ctx):
+    post_id = ctx.popular(ctx.threads)
+    return await client.get(f"/posts/{post_id}/comments/tree", params={"limit": 20, "depth": 3, "replies": 3})
+
+
+async def vote(client, ctx):
+    body = {"post_id": ctx.popular(ctx.posts), "dir": ctx.rng.randint(0, 1)}
+    return await client.post("/vote/", json=body, headers=ctx.auth())
+
+
+async def login(client, ctx):
+    form = {"username": ctx.rng.choice(ctx.readers), "password": BENCH_PASSWORD}
+    return await client.post("/login", data=form)
+
+
+# name -> (endpoint label in the report, request)
+SCENARIOS = {
+    "posts": ("GET /posts/", posts),
+    "hot": ("GET /posts/?Sort=hot", hot),
+    "feed": ("GET /feed", feed),
+    "profile": ("GET /profile/{id}", profile),
+    "thread": ("GET /posts/{id}/comments/tree", thread),
+    "vote": ("POST /vote/", vote),
+    "login": ("POST /login", login),
+}
+
+
+async def run(args) -> dict:
+    rng = random.Random(args.random_seed)
+    weights = {name: WEIGHTS[name] for name in (args.only or WEIGHTS)}
+    names, cum = list(weights), list(weights.values())
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        ctx = Context(rng)
+        await ctx.load(client, args.sessions, args.readers)
+        # Warm caches and connection pools so the first seconds do not skew the percentiles
+        await asyncio.gather(*(SCENARIOS[name][1](client, ctx) for name in names for _ in range(5)))
+        deadline = time.perf_counter() + args.duration
+
+        async def virtual_user():
+            while time.perf_counter() < deadline:
+                label, scenario = SCENARIOS[rng.choices(names, weights=cum)[0]]
+                start = time.perf_counter()
+                try:
+                    ok = (await scenario(client, ctx)).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies[label].append(time.perf_counter() - start)
+                else:
+                    errors[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        label: {
+            "requests": len(latencies[label]),
+            "errors": errors[label],
+            "rps": len(latencies[label]) / elapsed,
+            "p50": percentile(latencies[label], 50) * 1000,
+            "p95": percentile(latencies[label], 95) * 1000,
+            "p99": percentile(latencies[label], 99) * 1000,
+        }
+        for label in sorted(latencies.keys() | errors.keys())
+    }
+
+
+def change(now: float, before: float | None) -> str:
+    if not before:
+        return ""
+    return f"{(now - before) / before:+.0%}"
+
+
+def report(results: dict, baseline: dict | None):
+    columns = ("req/s", "p50 ms", "p95 ms", "p99 ms")
+    header = f"{'endpoint':<32}" + "".join(f"{c:>10}" for c in columns) + f"{'errors':>8}"
+    if baseline:
+        header += f"{'Δ req/s':>10}{'Δ p50':>8}{'Δ p99':>8}"
+    print(header)
+    for label, r in results.items():
+        line = f"{label:<32}{r['rps']:>10.1f}{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8}"
+        if baseline:
+            b = baseline.get(label, {})
+            line += f"{change(r['rps'], b.get('rps')):>10}{change(r['p50'], b.get('p50')):>8}"
+            line += f"{change(r['p99'], b.get('p99')):>8}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", help="base url of the server, e.g. http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--only", action="append", choices=list(SCENARIOS),
+                        help="run just this scenario; repeatable")
+    parser.add_argument("--sessions", type=int, default=50, help="reader accounts logged in up front")
+    parser.add_argument("--readers", type=int, default=1000,
+                        help="accounts used for logins (the seeder's --readers have materialized feeds)")
+    parser.add_argument("--random-seed", type=int, default=7)
+    parser.add_argument("--save", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved by an earlier run")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as saved:
+            baseline = json.load(saved)
+    print(f"{args.concurrency} virtual users for {args.duration:.0f}s against {args.url}")
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
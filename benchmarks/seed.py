@@ -0,0 +1,284 @@
+"""Bulk-load a synthetic social network for the benchmark scenarios.
+
+Everything it creates hangs off accounts named ``bench_<n>``, all sharing the
+password BENCH_PASSWORD:
+
+    users          --users accounts
+    followers      log-uniform out-degrees up to --max-degree; targets are Zipfian over a
+                   random popularity order, so a few accounts collect most followers
+    post           --posts posts, authors Zipfian by activity, spread over the last --days
+    votes          about --votes votes, Zipfian over posts (repeat draws are dropped)
+    comments       threads on Zipfian posts until --comments rows exist; most replies
+                   answer the newest comment, so popular threads run --max-depth deep
+    comment_likes  about --likes likes, Zipfian over comments
+    timeline       materialized feeds of the first --readers accounts
+
+Rows are generated in Python and streamed in with COPY (asyncpg's
+copy_records_to_table), then counters and hot scores are filled in by a handful of
+set-based UPDATEs and the tables are analyzed. The defaults load about six million
+rows; --random-seed makes a run reproducible, so two builds can be measured on the
+same data.
+
+    python -m benchmarks.seed
+    python -m benchmarks.seed --users 10000 --posts 50000 --votes 200000 --comments 100000 --likes 100000
+    python -m benchmarks.seed --cleanup
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+from sqlalchemy import update
+
+from app.models import models
+from app.utils import ranking, utils
+from app.utils.config import settings
+from app.utils.database import SessionLocal, engine
+
+PREFIX = "bench_"
+# LIKE pattern for the prefix; "_" is a wildcard there
+PREFIX_PATTERN = PREFIX.replace("_", "\\_") + "%"
+BENCH_PASSWORD = "benchmark"
+BATCH = 50_000
+
+
+def zipf(n: int, s: float, rng: random.Random):
+    """A sampler of k indexes in range(n) with P(rank r) proportional to 1 / r^s.
+
+    Ranks are mapped to a shuffled order, so the popular items are spread over the id range.
+    """
+    cum_weights, total = [], 0.0
+    for rank in range(1, n + 1):
+        total += rank ** -s
+        cum_weights.append(total)
+    order = list(range(n))
+    rng.shuffle(order)
+    ranks = range(n)
+
+    def draw(k: int) -> list[int]:
+        return [order[r] for r in rng.choices(ranks, cum_weights=cum_weights, k=k)]
+    return draw
+
+
+def batches(rows, size: int = BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def copy(conn, table: str, columns: list[str], rows) -> int:
+    started, count = time.perf_counter(), 0
+    for batch in batches(rows):
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        count += len(batch)
+    print(f"  {table:<14}{count:>10} rows  {time.perf_counter() - started:6.1f}s")
+    return count
+
+
+class Generator:
+    """Row generators for one run; ids continue after whatever the tables already hold."""
+
+    def __init__(self, args, first_user: int, first_post: int, first_comment: int):
+        self.args = args
+        self.rng = random.Random(args.random_seed)
+        self.now = datetime.now(timezone.utc)
+        self.first_user, self.first_post, self.first_comment = first_user, first_post, first_comment
+        self.post_times: list[datetime] = []
+        self.comments = 0
+
+    def users(self, password: str):
+        for n in range(self.args.users):
+            created = self.now - timedelta(days=400 * self.rng.random())
+            yield (self.first_user + n, f"Bench User {n}", f"{PREFIX}{n}", f"{PREFIX}{n}@example.com", password, created)
+
+    def followers(self):
+        popular = zipf(self.args.users, 1.0, self.rng)
+        log_max = math.log(self.args.max_degree)
+        for n in range(self.args.users):
+            degree = int(math.exp(self.rng.random() * log_max))
+            for target in set(popular(degree)) - {n}:
+                created = self.now - timedelta(days=365 * self.rng.random())
+                yield (self.first_user + n, self.first_user + target, created)
+
+    def posts(self):
+        authors = zipf(self.args.users, 0.8, self.rng)
+        for n, author in enumerate(authors(self.args.posts)):
+            created = self.now - timedelta(days=self.args.days * self.rng.random())
+            self.post_times.append(created)
+            yield (self.first_post + n, f"Benchmark post {n}", f"Generated content for post {n}. " * 4,
+                   self.first_user + author, created)
+
+    def votes(self):
+        posts, seen = zipf(self.args.posts, 1.1, self.rng), set()
+        for start in range(0, self.args.votes, BATCH):
+            for post in posts(min(BATCH, self.args.votes - start)):
+                user = self.rng.randrange(self.args.users)
+                key = post * self.args.users + user
+                if key not in seen:
+                    seen.add(key)
+                    yield (self.first_user + user, self.first_post + post)
+
+    def thread_comments(self):
+        posts = zipf(self.args.posts, 1.1, self.rng)
+        next_id = self.first_comment
+        while self.comments < self.args.comments:
+            for post in posts(1000):
+                size = min(self.args.max_thread, int(self.rng.paretovariate(1.1)))
+                thread: list[tuple[int, int]] = []  # (id, depth) in creation order
+                at = self.post_times[post]
+                for _ in range(size):
+                    roll = self.rng.random()
+                    if not thread or roll < 0.15:
+                        parent, depth = None, 0
+                    elif roll < 0.8 and thread[-1][1] < self.args.max_depth:
+                        parent, depth = thread[-1][0], thread[-1][1] + 1
+                    else:
+                        parent, parent_depth = self.rng.choice(thread)
+                        depth = parent_depth + 1
+                        if depth > self.args.max_depth:
+                            parent, depth = None, 0
+                    at = min(self.now, at + timedelta(seconds=self.rng.expovariate(1 / 900)))
+                    yield (next_id, f"Benchmark comment {next_id}", self.first_user + self.rng.randrange(self.args.users),
+                           self.first_post + post, parent, at)
+                    thread.append((next_id, depth))
+                    next_id += 1
+                    self.comments += 1
+                if self.comments >= self.args.comments:
+                    return
+
+    def comment_likes(self):
+        comments, seen = zipf(self.comments, 1.0, self.rng), set()
+        for start in range(0, self.args.likes, BATCH):
+            for comment in comments(min(BATCH, self.args.likes - start)):
+                user = self.rng.randrange(self.args.users)
+                key = comment * self.args.users + user
+                if key not in seen:
+                    seen.add(key)
+                    yield (self.first_user + user, self.first_comment + comment)
+
+
+# Each statement recounts one counter over the benchmark rows, whose ids all start at $1
+COUNTERS = [
+    ("user", """UPDATE users SET followers_count = c.n FROM (
+        SELECT followed_id AS id, count(*) AS n FROM followers WHERE followed_id >= $1 GROUP BY 1
+    ) c WHERE users.id = c.id"""),
+    ("user", """UPDATE users SET following_count = c.n FROM (
+        SELECT follower_id AS id, count(*) AS n FROM followers WHERE follower_id >= $1 GROUP BY 1
+    ) c WHERE users.id = c.id"""),
+    ("post", """UPDATE users SET posts_count = c.n FROM (
+        SELECT user_id AS id, count(*) AS n FROM post WHERE id >= $1 GROUP BY 1
+    ) c WHERE users.id = c.id"""),
+    ("post", """UPDATE post SET votes_count = c.n FROM (
+        SELECT post_id AS id, count(*) AS n FROM votes WHERE post_id >= $1 GROUP BY 1
+    ) c WHERE post.id = c.id"""),
+    ("post", """UPDATE post SET comments_count = c.n FROM (
+        SELECT post_id AS id, count(*) AS n FROM comments WHERE post_id >= $1 GROUP BY 1
+    ) c WHERE post.id = c.id"""),
+    ("comment", """UPDATE comments SET replies_count = c.n FROM (
+        SELECT parent_id AS id, count(*) AS n FROM comments WHERE parent_id >= $1 GROUP BY 1
+    ) c WHERE comments.id = c.id"""),
+    ("comment", """UPDATE comments SET likes_count = c.n FROM (
+        SELECT comment_id AS id, count(*) AS n FROM comment_likes WHERE comment_id >= $1 GROUP BY 1
+    ) c WHERE comments.id = c.id"""),
+]
+
+# Fan-out-on-write for the reader accounts; celebrity authors are merged in at read time
+TIMELINES = """
+    INSERT INTO timeline (user_id, post_id, author_id, created_at)
+    SELECT f.follower_id, p.id, p.user_id, p.created_at
+    FROM followers f
+    JOIN users author ON author.id = f.followed_id AND author.followers_count < $3
+    JOIN post p ON p.user_id = f.followed_id
+    WHERE f.follower_id BETWEEN $1 AND $2
+    ON CONFLICT DO NOTHING
+"""
+
+
+async def connect() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        user=settings.DATABASE_USER, password=settings.DATABASE_PASSWORD, host=settings.DATABASE_HOST,
+        port=int(settings.DATABASE_PORT), database=settings.DATABASE_NAME,
+    )
+
+
+async def next_id(conn, table: str) -> int:
+    return await conn.fetchval(f"SELECT coalesce(max(id), 0) + 1 FROM {table}")
+
+
+async def seed(args):
+    conn = await connect()
+    try:
+        if await conn.fetchval("SELECT 1 FROM users WHERE user_name LIKE $1 LIMIT 1", PREFIX_PATTERN):
+            raise SystemExit("Benchmark data already present; run with --cleanup first")
+        gen = Generator(args, await next_id(conn, "users"), await next_id(conn, "post"), await next_id(conn, "comments"))
+        started = time.perf_counter()
+        print("Loading with COPY:")
+        await copy(conn, "users", ["id", "name", "user_name", "email", "password", "created_at"],
+                   gen.users(utils.hash_password(BENCH_PASSWORD)))
+        await copy(conn, "followers", ["follower_id", "followed_id", "created_at"], gen.followers())
+        await copy(conn, "post", ["id", "title", "content", "user_id", "created_at"], gen.posts())
+        await copy(conn, "votes", ["user_id", "post_id"], gen.votes())
+        await copy(conn, "comments", ["id", "comment", "user_id", "post_id", "parent_id", "created_at"],
+                   gen.thread_comments())
+        await copy(conn, "comment_likes", ["user_id", "comment_id"], gen.comment_likes())
+        for table in ("users", "post", "comments"):
+            await conn.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+
+        print("Filling counters, hot scores and reader timelines")
+        first = {"user": gen.first_user, "post": gen.first_post, "comment": gen.first_comment}
+        for kind, statement in COUNTERS:
+            await conn.execute(statement, first[kind])
+        async with SessionLocal() as db:
+            await db.execute(
+                update(models.Post).where(models.Post.id >= gen.first_post).values(hot_score=ranking.hot_score())
+            )
+            await db.commit()
+        readers_last = gen.first_user + min(args.readers, args.users) - 1
+        await conn.execute(TIMELINES, gen.first_user, readers_last, settings.FEED_FANOUT_THRESHOLD)
+        await conn.execute("ANALYZE")
+        print(f"Seeded in {time.perf_counter() - started:.1f}s; log in as {PREFIX}0 .. {PREFIX}{args.users - 1} "
+              f"with password '{BENCH_PASSWORD}'")
+    finally:
+        await conn.close()
+        await engine.dispose()
+
+
+async def cleanup():
+    conn = await connect()
+    try:
+        # Posts, follows, votes, comments, likes and timelines go with the accounts (ON DELETE CASCADE)
+        removed = await conn.execute("DELETE FROM users WHERE user_name LIKE $1", PREFIX_PATTERN)
+        await conn.execute("ANALYZE")
+        print(f"Removed {removed.split()[-1]} benchmark users and everything they created")
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cleanup", action="store_true", help="delete the benchmark data and exit")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--max-degree", type=int, default=100, help="largest number of accounts one user follows")
+    parser.add_argument("--posts", type=int, default=500_000)
+    parser.add_argument("--votes", type=int, default=2_000_000)
+    parser.add_argument("--comments", type=int, default=1_000_000)
+    parser.add_argument("--likes", type=int, default=1_000_000)
+    parser.add_argument("--readers", type=int, default=1000, help="accounts whose timelines are materialized")
+    parser.add_argument("--days", type=int, default=90, help="posts are spread over this many days")
+    parser.add_argument("--max-depth", type=int, default=20, help="deepest reply nesting in a thread")
+    parser.add_argument("--max-thread", type=int, default=500, help="most comments in one thread")
+    parser.add_argument("--random-seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(cleanup() if args.cleanup else seed(args))
+
+
+if __name__ == "__main__":
+    main()
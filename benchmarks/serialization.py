@@ -0,0 +1,88 @@
+"""Micro-benchmark: ORM + pydantic serialization vs. tuple rows + orjson for post lists.
+
+Runs the page statements behind GET /posts/ and GET /feed against the configured
+database and times fetch + encode for each path, without HTTP in the way:
+
+    orm     Post entities with a joined owner, validated through
+            PostDetailResponse with from_attributes and dumped by pydantic
+            (what FastAPI does with a response_model)
+    rows    the same columns selected as tuples, shaped by listing.post_detail
+            and encoded with orjson
+
+    python -m benchmarks.serialization --limit 50 --iterations 200 --feed-user 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import joinedload
+
+from app.models import models
+from app.schemas import post
+from app.utils import listing, timeline
+from app.utils.database import SessionLocal, engine
+from app.utils.pagination import keyset
+
+post_list = TypeAdapter(List[post.PostDetailResponse])
+
+
+def as_orm(statement):
+    """The same page statement, loading Post entities (and their owner) instead of tuples."""
+    return statement.with_only_columns(models.Post).options(joinedload(models.Post.owner))
+
+
+async def orm_path(db, statement) -> bytes:
+    posts = (await db.scalars(statement)).unique().all()
+    payload = [{"Post": p, "votes": p.votes_count, "comments_count": p.comments_count} for p in posts]
+    return post_list.dump_json(post_list.validate_python(payload, from_attributes=True))
+
+
+async def rows_path(db, statement) -> bytes:
+    rows = (await db.execute(statement)).all()
+    return listing.render([listing.post_detail(row) for row in rows])
+
+
+async def measure(path, statement, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        # A fresh session each time, as per request, so the identity map starts empty
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            await path(db, statement)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main_async(args):
+    statements = {
+        "/posts/": keyset(listing.select_posts(), (models.Post.created_at, models.Post.id), args.limit),
+    }
+    if args.feed_user is not None:
+        statements["/feed"] = timeline.feed_query(args.feed_user, args.limit)
+
+    print(f"limit={args.limit}  iterations={args.iterations}")
+    print(f"{'endpoint':<10}{'path':<6}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'bytes':>9}")
+    for endpoint, statement in statements.items():
+        for label, path, stmt in (("orm", orm_path, as_orm(statement)), ("rows", rows_path, statement)):
+            async with SessionLocal() as db:
+                size = len(await path(db, stmt))
+            samples = sorted(await measure(path, stmt, args.iterations))
+            p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+            print(f"{endpoint:<10}{label:<6}{statistics.mean(samples) * 1000:>10.2f}"
+                  f"{statistics.median(samples) * 1000:>10.2f}{p95 * 1000:>10.2f}{size:>9}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--feed-user", type=int, help="reader id for the /feed statement; skipped if omitted")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark "who to follow" on a synthetic power-law follow graph.
+
+Seeds --users accounts (user_name prefixed ``sgbench_``) whose out-degrees are
+log-uniform up to --max-degree and whose follow targets are heavily skewed towards
+a few celebrity accounts, about a million edges with the defaults. Then, for the
+most active accounts and for a random sample, it times:
+
+    exact    the full two-hop join over followers
+    sampled  suggestions.candidates_query (bounded recent-follow sampling)
+    cached   suggestions.suggest on a warm per-viewer cache
+
+and reports how many of the exact top 10 the sampled top 10 recovers.
+
+    python -m benchmarks.suggestions --seed
+    python -m benchmarks.suggestions            # reuse the seeded graph
+    python -m benchmarks.suggestions --cleanup
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.utils import counters, suggestions
+from app.utils.database import SessionLocal, engine
+
+PREFIX = "sgbench_"
+
+SEED_USERS = text("""
+    INSERT INTO users (name, user_name, email, password)
+    SELECT :prefix || g, :prefix || g, :prefix || g || '@example.invalid', 'not-a-hash'
+    FROM generate_series(1, :n) AS g
+""")
+
+# Out-degree exp(U * ln max) is log-uniform; target rank n * U^3 puts most edges on a few accounts
+SEED_EDGES = text("""
+    WITH accounts AS (
+        SELECT array_agg(id ORDER BY id) AS ids FROM users WHERE user_name LIKE :prefix || '%'
+    ),
+    degrees AS (
+        SELECT id, floor(exp(random() * ln(:max_degree)))::int AS d
+        FROM users WHERE user_name LIKE :prefix || '%'
+    ),
+    edges AS (
+        SELECT degrees.id AS follower_id,
+               accounts.ids[1 + floor(cardinality(accounts.ids) * power(random(), 3))::int] AS followed_id,
+               now() - random() * interval '365 days' AS created_at
+        FROM degrees, accounts, generate_series(1, degrees.d)
+    )
+    INSERT INTO followers (follower_id, followed_id, created_at)
+    SELECT follower_id, followed_id, created_at FROM edges WHERE follower_id <> followed_id
+    ON CONFLICT DO NOTHING
+""")
+
+EXACT = text("""
+    SELECT f2.followed_id, count(*) AS mutuals
+    FROM followers f1
+    JOIN followers f2 ON f2.follower_id = f1.followed_id
+    WHERE f1.follower_id = :viewer AND f2.followed_id <> :viewer
+      AND NOT EXISTS (SELECT 1 FROM followers f3 WHERE f3.follower_id = :viewer AND f3.followed_id = f2.followed_id)
+    GROUP BY f2.followed_id
+    ORDER BY mutuals DESC, f2.followed_id
+    LIMIT :keep
+""")
+
+
+async def seed(users: int, max_degree: int):
+    async with SessionLocal() as db:
+        await db.execute(SEED_USERS, {"prefix": PREFIX, "n": users})
+        edges = (await db.execute(SEED_EDGES, {"prefix": PREFIX, "max_degree": max_degree})).rowcount
+        ids = (await db.scalars(text("SELECT id FROM users WHERE user_name LIKE :p || '%'"), {"p": PREFIX})).all()
+        await counters.reconcile(db, user_ids=ids)
+        await db.commit()
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE followers"))
+        await conn.commit()
+    print(f"Seeded {users} users and {edges} follow edges")
+
+
+async def cleanup():
+    async with SessionLocal() as db:
+        removed = (await db.execute(text("DELETE FROM users WHERE user_name LIKE :p || '%'"), {"p": PREFIX})).rowcount
+        await db.commit()
+    print(f"Removed {removed} benchmark users and their edges")
+
+
+async def timed(fn, viewers) -> tuple[list[float], list]:
+    samples, results = [], []
+    for viewer in viewers:
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            results.append(await fn(db, viewer))
+            samples.append(time.perf_counter() - start)
+    return samples, results
+
+
+async def exact(db, viewer):
+    return [user_id for user_id, _ in (await db.execute(EXACT, {"viewer": viewer, "keep": 10})).all()]
+
+
+async def sampled(db, viewer):
+    return [user_id for user_id, _ in (await db.execute(suggestions.candidates_query(viewer, 10))).all()]
+
+
+async def cached(db, viewer):
+    return [user_id for user_id, _ in await suggestions.suggest(db, viewer, 10)]
+
+
+async def run(viewers_per_group: int):
+    async with SessionLocal() as db:
+        active = (await db.scalars(text(
+            "SELECT id FROM users WHERE user_name LIKE :p || '%' ORDER BY following_count DESC LIMIT :k"
+        ), {"p": PREFIX, "k": viewers_per_group})).all()
+        rand = (await db.scalars(text(
+            "SELECT id FROM users WHERE user_name LIKE :p || '%' ORDER BY random() LIMIT :k"
+        ), {"p": PREFIX, "k": viewers_per_group})).all()
+    if not active:
+        raise SystemExit("No benchmark graph found; run with --seed first")
+
+    print(f"{'viewers':<10}{'path':<9}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'top-10 recall':>15}")
+    for label, viewers in (("active", active), ("random", rand)):
+        exact_samples, exact_top = await timed(exact, viewers)
+        sampled_samples, sampled_top = await timed(sampled, viewers)
+        await timed(cached, viewers)  # warm the cache
+        cached_samples, _ = await timed(cached, viewers)
+        hits = sum(len(set(e) & set(s)) for e, s in zip(exact_top, sampled_top))
+        total = sum(len(e) for e in exact_top) or 1
+        for path, samples, recall in (("exact", exact_samples, ""), ("sampled", sampled_samples, f"{hits / total:.0%}"),
+                                      ("cached", cached_samples, "")):
+            samples = sorted(samples)
+            p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+            print(f"{label:<10}{path:<9}{statistics.median(samples) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+                  f"{samples[-1] * 1000:>10.1f}{recall:>15}")
+
+
+async def main_async(args):
+    if args.cleanup:
+        await cleanup()
+    else:
+        if args.seed:
+            await seed(args.users, args.max_degree)
+        await run(args.viewers)
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", action="store_true", help="create the synthetic graph first")
+    parser.add_argument("--cleanup", action="store_true", help="delete the synthetic graph and exit")
+    parser.add_argument("--users", type=int, default=12500)
+    parser.add_argument("--max-degree", type=int, default=500)
+    parser.add_argument("--viewers", type=int, default=50, help="viewers timed per group")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
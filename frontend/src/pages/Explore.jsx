@@ -14,10 +14,14 @@ const Explore = () => {
         params: {
           Limit: 100,
           Skip: 0,
-          Search: searchTerm
+          Search: searchTerm,
+          SearchMode: 'fulltext'
         }
       });
-      const sortedPosts = response.data.sort((a, b) => (b.votes || 0) - (a.votes || 0));
+      // Search results arrive ranked by relevance; only the default listing is re-sorted
+      const sortedPosts = searchTerm
+        ? response.data
+        : response.data.sort((a, b) => (b.votes || 0) - (a.votes || 0));
       setPosts(sortedPosts);
     } catch (error) {
       console.error('Error fetching posts:', error);
@@ -12,6 +12,9 @@ const PostDetail = () => {
   const { push } = useToast();
   const [post, setPost] = useState(null);
   const [comments, setComments] = useState([]);
+  const [commentsCursor, setCommentsCursor] = useState(null);
+  const [commentsCount, setCommentsCount] = useState(0);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [newComment, setNewComment] = useState('');
   const [loading, setLoading] = useState(true);
   const [isLiked, setIsLiked] = useState(false);
@@ -22,25 +25,48 @@ const PostDetail = () => {
   const [replyForId, setReplyForId] = useState(null);
   const [replyText, setReplyText] = useState('');
 
-  const fetchPostDetails = async () => {
+  // Every node of a comment tree, replies included
+  const flatten = (nodes) => nodes.flatMap(c => [c, ...flatten(c.replies || [])]);
+
+  // Apply fn to the node with the given id, wherever it sits in the tree
+  const updateNode = (nodes, id, fn) => nodes.map(c => (
+    c.id === id ? fn(c) : { ...c, replies: updateNode(c.replies || [], id, fn) }
+  ));
+
+  // Append a page, skipping anything already shown (e.g. a comment posted from this page)
+  const appendNew = (shown, page) => {
+    const ids = new Set(shown.map(c => c.id));
+    return [...shown, ...page.filter(c => !ids.has(c.id))];
+  };
+
+  // Tree pages come from a shared cache, so likes by the viewer are looked up separately
+  const absorbComments = async (nodes) => {
+    const all = flatten(nodes);
+    setCommentLikes(prev => ({ ...prev, ...Object.fromEntries(all.map(c => [c.id, c.likes])) }));
+    if (!user || all.length === 0) return;
     try {
-      const [postsResponse, commentsResponse, likesMapResponse] = await Promise.all([
-        api.get(`/posts/`, { params: { Limit: 100 } }),
-        api.get(`/posts/${postId}/comments`),
-        api.get(`/posts/${postId}/comments/likes`)
-      ]);
+      const params = new URLSearchParams();
+      all.forEach(c => params.append('ids', c.id));
+      const { data } = await api.get('/posts/comments/liked', { params });
+      setLikedComments(prev => new Set([...prev, ...data]));
+    } catch (e) {
+      console.error('Failed to load liked comments', e);
+    }
+  };
 
-      const foundPost = postsResponse.data.find(p => {
-        const postData = p.Post || p;
-        return postData.id === parseInt(postId);
-      });
+  const fetchPostDetails = async () => {
+    try {
+      const { data } = await api.get(`/posts/${postId}`);
 
-      if (foundPost) {
-        setPost(foundPost);
-        setLikesCount(foundPost.votes || 0);
-      }
-      setComments(commentsResponse.data);
-      setCommentLikes(likesMapResponse.data || {});
+      setPost(data);
+      setLikesCount(data.votes || 0);
+      setIsLiked(Boolean(data.voted));
+      setComments(data.comments);
+      setCommentsCursor(data.comments_cursor);
+      setCommentsCount(data.comments_count || 0);
+      const all = flatten(data.comments);
+      setCommentLikes(Object.fromEntries(all.map(c => [c.id, c.likes])));
+      setLikedComments(new Set(all.filter(c => c.liked).map(c => c.id)));
     } catch (error) {
       console.error('Error fetching post details:', error);
     } finally {
@@ -52,6 +78,36 @@ const PostDetail = () => {
     fetchPostDetails();
   }, [postId]);
 
+  const loadMoreComments = async () => {
+    setLoadingMore(true);
+    try {
+      const res = await api.get(`/posts/${postId}/comments/tree`, { params: { cursor: commentsCursor } });
+      setComments(prev => appendNew(prev, res.data));
+      setCommentsCursor(res.headers['x-next-cursor'] || null);
+      await absorbComments(res.data);
+    } catch (e) {
+      console.error('Failed to load comments', e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Continue a branch from its replies_cursor, or from its first reply when it was collapsed
+  const loadMoreReplies = async (comment) => {
+    try {
+      const params = comment.replies_cursor ? { cursor: comment.replies_cursor } : {};
+      const res = await api.get(`/posts/comments/${comment.id}/replies`, { params });
+      setComments(prev => updateNode(prev, comment.id, c => ({
+        ...c,
+        replies: appendNew(c.replies || [], res.data),
+        replies_cursor: res.headers['x-next-cursor'] || null,
+      })));
+      await absorbComments(res.data);
+    } catch (e) {
+      console.error('Failed to load replies', e);
+    }
+  };
+
   const handleLike = async () => {
     try {
       await api.post('/vote/', {
@@ -74,7 +130,9 @@ const PostDetail = () => {
       const response = await api.post(`/posts/${postId}/comment`, {
         comment: newComment.trim()
       });
-      setComments([...comments, response.data]);
+      // Comments run oldest first, so a new one belongs at the end once every page is loaded
+      if (!commentsCursor) setComments(prev => [...prev, { ...response.data, likes: 0, replies_count: 0, replies: [] }]);
+      setCommentsCount(prev => prev + 1);
       setNewComment('');
       push({ title: 'Reply posted', variant: 'success' });
     } catch (error) {
@@ -85,23 +143,6 @@ const PostDetail = () => {
     }
   };
 
-  // Build threaded comments tree
-  const buildCommentTree = (flat) => {
-    const byId = {};
-    flat.forEach(c => byId[c.id] = { ...c, children: [] });
-    const roots = [];
-    flat.forEach(c => {
-      if (c.parent_id) {
-        const parent = byId[c.parent_id];
-        if (parent) parent.children.push(byId[c.id]);
-        else roots.push(byId[c.id]); // orphan safeguard
-      } else {
-        roots.push(byId[c.id]);
-      }
-    });
-    return roots;
-  };
-
   const handleLikeComment = async (commentId) => {
     try {
       const isLiked = likedComments.has(commentId);
@@ -126,7 +167,15 @@ const PostDetail = () => {
     if (!replyForId || !replyText.trim()) return;
     try {
       const res = await api.post(`/posts/${replyForId}/reply`, { comment: replyText.trim() });
-      setComments([...comments, res.data]);
+      setComments(prev => updateNode(prev, replyForId, c => ({
+        ...c,
+        replies_count: c.replies_count + 1,
+        // Shown now only if the rest of the branch is already on the page
+        replies: (c.replies || []).length === c.replies_count
+          ? [...(c.replies || []), { ...res.data, likes: 0, replies_count: 0, replies: [] }]
+          : c.replies,
+      })));
+      setCommentsCount(prev => prev + 1);
       setReplyForId(null);
       setReplyText('');
       push({ title: 'Reply posted', variant: 'success' });
@@ -193,11 +242,20 @@ const PostDetail = () => {
               </div>
             </form>
           )}
-          {comment.children?.length > 0 && (
+          {comment.replies?.length > 0 && (
             <div className="mt-2 border-l border-border pl-4">
-              {comment.children.map(child => renderComment(child, depth + 1))}
+              {comment.replies.map(child => renderComment(child, depth + 1))}
             </div>
           )}
+          {comment.replies_count > (comment.replies?.length || 0) && (
+            <button
+              type="button"
+              onClick={() => loadMoreReplies(comment)}
+              className="mt-2 text-xs text-primary hover:underline"
+            >
+              Show {comment.replies_count - (comment.replies?.length || 0)} more replies
+            </button>
+          )}
         </div>
       </div>
     </div>
@@ -306,7 +364,7 @@ const PostDetail = () => {
 
           <div className="flex items-center gap-2 text-muted-foreground">
             <MessageCircle size={20} />
-            <span className="font-bold text-[15px]">{comments.length}</span>
+            <span className="font-bold text-[15px]">{commentsCount}</span>
           </div>
         </div>
       </div>
@@ -347,12 +405,24 @@ const PostDetail = () => {
             <p className="text-muted-foreground text-[15px]">No replies yet</p>
           </div>
         ) : (
-          buildCommentTree(comments).map((comment) => (
+          comments.map((comment) => (
             <div key={comment.id} className="bg-card/40 backdrop-blur-md">
               {renderComment(comment)}
             </div>
           ))
         )}
+        {commentsCursor && (
+          <div className="px-4 py-3 text-center">
+            <button
+              type="button"
+              onClick={loadMoreComments}
+              disabled={loadingMore}
+              className="text-primary text-[15px] hover:underline disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Show more replies'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -4,6 +4,8 @@ const API_URL = 'http://localhost:8000';
 
 const api = axios.create({
   baseURL: API_URL,
+  // Send and keep the API's cookies, so reads right after a write see it (read-your-writes)
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
@@ -48,7 +50,7 @@ export const postAPI = {
 
 // Comments endpoints
 export const commentAPI = {
-  getCommentsForPost: (postId) => api.get(`/posts/${postId}/comments`),
+  getCommentsForPost: (postId, cursor) => api.get(`/posts/${postId}/comments`, { params: { cursor } }),
   addCommentToPost: (postId, comment) => api.post(`/posts/${postId}/comment`, { comment }),
   replyToComment: (commentId, comment) => api.post(`/posts/${commentId}/reply`, { comment }),
   likeComment: (commentId) => api.post(`/posts/comments/${commentId}/like`, null, { params: { dir: 1 } }),
@@ -0,0 +1,128 @@
+"""Shared fixtures for the database-backed test suites.
+
+The tests run against their own database, TEST_DATABASE_NAME (default
+``<DATABASE_NAME>_test``) on the configured server, which is created if missing and
+rebuilt from the models and seeded with tests/dataset.py on every run. Suites are
+skipped when the server is unreachable.
+"""
+import os
+from contextlib import contextmanager
+
+import pytest
+
+from app.utils.config import settings
+
+# Must happen before anything imports app.utils.database, which builds the engine from settings
+settings.DATABASE_NAME = os.environ.get("TEST_DATABASE_NAME", f"{settings.DATABASE_NAME}_test")
+
+import httpx  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models import models  # noqa: E402
+from app.utils import database, oauth2, query_stats  # noqa: E402
+from app.utils.cache import caches  # noqa: E402
+from . import dataset  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+async def _create_database():
+    server = create_async_engine(
+        database.SQLALCHEMY_DATABASE_URL.rsplit("/", 1)[0] + "/postgres", isolation_level="AUTOCOMMIT"
+    )
+    try:
+        async with server.connect() as conn:
+            exists = await conn.exec_driver_sql(
+                "SELECT 1 FROM pg_database WHERE datname = $1", (settings.DATABASE_NAME,)
+            )
+            if exists.scalar() is None:
+                await conn.exec_driver_sql(f'CREATE DATABASE "{settings.DATABASE_NAME}"')
+    finally:
+        await server.dispose()
+
+
+@pytest.fixture(scope="session")
+async def db_schema(anyio_backend):
+    """An empty schema built from the models."""
+    try:
+        await _create_database()
+    except Exception as error:
+        pytest.skip(f"Test database unavailable: {error!r}")
+    async with database.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    yield
+    await database.engine.dispose()
+
+
+@pytest.fixture(scope="session")
+async def seeded(db_schema):
+    """The schema loaded with tests/dataset.py and analyzed."""
+    async with database.SessionLocal() as db:
+        await dataset.seed(db)
+        await db.commit()
+    async with database.engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+        await conn.commit()
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    """Start every test with empty in-process caches, so each request really reaches the database."""
+    for cache in caches.values():
+        cache.clear()
+
+
+@pytest.fixture
+async def client(seeded):
+    """An HTTP client for the app, signed in as dataset.VIEWER."""
+    token = oauth2.create_access_token({"user_id": dataset.VIEWER})
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test",
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+@contextmanager
+def _capture():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(database.engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(database.engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def captured_statements():
+    """A context manager recording (sql, parameters) for every statement the app's engine sends."""
+    return _capture
+
+
+@pytest.fixture
+def query_budget():
+    """Fail if the block runs more than max_queries statements, or repeats one N+1 style.
+
+        with query_budget(2):
+            await client.get("/feed")
+    """
+    query_stats.instrument(database.engine)
+
+    @contextmanager
+    def budget(max_queries: int, n_plus_one: bool = False):
+        with query_stats.track() as stats:
+            yield stats
+        listing = "\n".join(f"  {' '.join(sql.split())}" for sql in stats.statements)
+        assert stats.count <= max_queries, f"{stats.count} queries, budget {max_queries}:\n{listing}"
+        if not n_plus_one:
+            repeated = stats.n_plus_one()
+            assert not repeated, f"N+1 pattern: {repeated}"
+    return budget
@@ -0,0 +1,80 @@
+"""The seeded dataset shared by the database-backed suites.
+
+Large enough that the planner prefers indexes where they exist, small enough to load
+in a few seconds. Ids are predictable because the schema is rebuilt before seeding.
+"""
+from sqlalchemy import text
+
+from app.utils import counters
+
+USERS, POSTS, ROOT_COMMENTS, REPLIES, VOTES, LIKES, FOLLOWS = 2000, 50000, 40000, 40000, 100000, 50000, 40000
+
+# The signed-in user, an author with posts, a post with comments, and a comment with replies
+VIEWER, AUTHOR, POST, COMMENT = 1, 2, 3, 4
+
+SEED = [
+    text("""
+        INSERT INTO users (name, user_name, email, password)
+        SELECT 'user' || g, 'user' || g, 'user' || g || '@example.com', 'not-a-hash'
+        FROM generate_series(1, :users) AS g
+    """),
+    text("""
+        INSERT INTO post (title, content, user_id, created_at)
+        SELECT 'post ' || g, 'content of post ' || g, 1 + (g % :users), now() - random() * interval '60 days'
+        FROM generate_series(1, :posts) AS g
+    """),
+    text("""
+        INSERT INTO comments (comment, user_id, post_id, created_at)
+        SELECT 'comment ' || g, 1 + (g % :users), 1 + (g % :posts), now() - random() * interval '30 days'
+        FROM generate_series(1, :roots) AS g
+    """),
+    text("""
+        INSERT INTO comments (comment, user_id, post_id, parent_id, created_at)
+        SELECT 'reply ' || g, 1 + (g % :users), parent.post_id, parent.id, parent.created_at + interval '1 hour'
+        FROM generate_series(1, :replies) AS g
+        JOIN comments parent ON parent.id = 1 + (g % :roots)
+    """),
+    text("""
+        INSERT INTO votes (user_id, post_id)
+        SELECT 1 + floor(random() * :users)::int, 1 + floor(random() * :posts)::int
+        FROM generate_series(1, :votes)
+        ON CONFLICT DO NOTHING
+    """),
+    text("""
+        INSERT INTO notifications (recipient_id, kind, target_id, post_id, last_actor_id, actors_count,
+                                   created_at, updated_at, read_at)
+        SELECT p.user_id, 'vote', p.id, p.id, max(v.user_id), count(*), p.created_at, p.created_at + interval '1 hour',
+               CASE WHEN p.id % 4 = 0 THEN NULL ELSE p.created_at + interval '2 hours' END
+        FROM votes v JOIN post p ON p.id = v.post_id
+        GROUP BY p.id
+    """),
+    text("""
+        INSERT INTO comment_likes (user_id, comment_id)
+        SELECT 1 + floor(random() * :users)::int, 1 + floor(random() * :roots)::int
+        FROM generate_series(1, :likes)
+        ON CONFLICT DO NOTHING
+    """),
+    text("""
+        INSERT INTO followers (follower_id, followed_id, created_at)
+        SELECT 1 + floor(random() * :users)::int, 1 + floor(random() * :users)::int,
+               now() - random() * interval '365 days'
+        FROM generate_series(1, :follows)
+        ON CONFLICT DO NOTHING
+    """),
+    text("""
+        INSERT INTO timeline (user_id, post_id, author_id, created_at)
+        SELECT f.follower_id, p.id, p.user_id, p.created_at
+        FROM followers f JOIN post p ON p.user_id = f.followed_id
+        WHERE f.follower_id <= 50
+        ON CONFLICT DO NOTHING
+    """),
+]
+
+
+async def seed(db):
+    """Load the dataset and fill in the counters, without committing."""
+    params = {"users": USERS, "posts": POSTS, "roots": ROOT_COMMENTS, "replies": REPLIES,
+              "votes": VOTES, "likes": LIKES, "follows": FOLLOWS}
+    for statement in SEED:
+        await db.execute(statement, {k: v for k, v in params.items() if f":{k}" in statement.text})
+    await counters.reconcile(db)
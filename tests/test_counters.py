@@ -0,0 +1,85 @@
+"""Stored engagement counters: kept in step by the writes, repaired by reconcile."""
+import pytest
+from sqlalchemy import update
+
+from app.models import models
+from app.utils import counters, oauth2
+from app.utils.database import SessionLocal
+from .dataset import VIEWER
+
+pytestmark = pytest.mark.anyio
+
+
+def as_user(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {oauth2.create_access_token({'user_id': user_id})}"}
+
+
+async def stored(model, id: int):
+    async with SessionLocal() as db:
+        return await db.get(model, id)
+
+
+@pytest.fixture
+async def own_post(client):
+    response = await client.post("/posts/", json={"title": "counted", "content": "count me"})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def test_vote_toggle_moves_the_counter(client, own_post):
+    for voter, dir, expected in [(10, 1, 1), (11, 1, 2), (10, 0, 1), (11, 0, 0), (12, 1, 1)]:
+        response = await client.post("/vote/", json={"post_id": own_post, "dir": dir}, headers=as_user(voter))
+        assert response.json()["votes"] == expected
+    assert (await stored(models.Post, own_post)).votes_count == 1
+    assert (await client.get(f"/posts/{own_post}")).json()["votes"] == 1
+
+
+async def test_comments_and_posts_are_counted(client, own_post):
+    before = (await stored(models.User, VIEWER)).posts_count
+    comment = (await client.post(f"/posts/{own_post}/comment", json={"comment": "one"})).json()
+    await client.post(f"/posts/{comment['id']}/reply", json={"comment": "two"})
+    assert (await stored(models.Post, own_post)).comments_count == 2
+    assert (await stored(models.Comments, comment["id"])).replies_count == 1
+
+    await client.delete(f"/posts/{own_post}")
+    assert (await stored(models.User, VIEWER)).posts_count == before - 1
+
+
+async def test_reconcile_repairs_drift(client, own_post):
+    await client.post("/vote/", json={"post_id": own_post, "dir": 1}, headers=as_user(10))
+    comment = (await client.post(f"/posts/{own_post}/comment", json={"comment": "drift"})).json()
+    posts_count = (await stored(models.User, VIEWER)).posts_count
+    async with SessionLocal() as db:
+        await db.execute(update(models.Post).where(models.Post.id == own_post).values(votes_count=42, comments_count=7))
+        await db.execute(update(models.User).where(models.User.id == VIEWER).values(posts_count=posts_count + 5))
+        await db.execute(update(models.Comments).where(models.Comments.id == comment["id"]).values(likes_count=3))
+        assert await counters.reconcile(db, post_ids=[own_post], user_ids=[VIEWER], comment_ids=[comment["id"]]) \
+            == (1, 1, 1)
+        await db.commit()
+
+    post = await stored(models.Post, own_post)
+    assert (post.votes_count, post.comments_count) == (1, 1)
+    assert (await stored(models.User, VIEWER)).posts_count == posts_count
+    assert (await stored(models.Comments, comment["id"])).likes_count == 0
+
+
+async def test_repeated_votes_and_likes_are_no_ops(client, own_post):
+    vote = {"post_id": own_post, "dir": 1}
+    assert (await client.post("/vote/", json=vote)).json() == \
+        {"message": "Successfully added vote", "voted": True, "votes": 1}
+    assert (await client.post("/vote/", json=vote)).json() == {"message": "Already liked", "voted": True, "votes": 1}
+    await client.post("/vote/", json={**vote, "dir": 0})
+    assert (await client.post("/vote/", json={**vote, "dir": 0})).json()["votes"] == 0
+
+    comment = (await client.post(f"/posts/{own_post}/comment", json={"comment": "like me"})).json()
+    like = f"/posts/comments/{comment['id']}/like"
+    assert (await client.post(f"{like}?dir=1")).json() == {"message": "Liked", "liked": True, "likes": 1}
+    assert (await client.post(f"{like}?dir=1")).json() == {"message": "Already liked", "liked": True, "likes": 1}
+    assert (await client.post(f"{like}?dir=0")).json()["likes"] == 0
+    assert (await client.post(f"{like}?dir=0")).json() == {"message": "Already unliked", "liked": False, "likes": 0}
+    assert (await stored(models.Comments, comment["id"])).likes_count == 0
+
+
+async def test_votes_on_missing_targets_are_404(client):
+    assert (await client.post("/vote/", json={"post_id": 10**9, "dir": 1})).status_code == 404
+    assert (await client.post(f"/posts/comments/{10**9}/like?dir=1")).status_code == 404
@@ -0,0 +1,24 @@
+"""The password hashing pool."""
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.utils import hashing
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_broken_pool_is_replaced(anyio_backend):
+    hashing.start()
+    broken = hashing._pool
+    # A worker process exiting mid-task breaks the whole executor
+    with pytest.raises(BrokenProcessPool):
+        await asyncio.get_running_loop().run_in_executor(broken, os._exit, 1)
+
+    hashed = await hashing.hash_password("secret")
+    assert hashing._pool is not broken
+    assert (await hashing.verify_and_update_password("secret", hashed))[0]
+    assert hashing.stats()["restarts"] >= 1
+    hashing.shutdown()
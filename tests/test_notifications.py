@@ -0,0 +1,84 @@
+"""Notification generation, coalescing and the unread count."""
+import pytest
+
+from app.utils import notifications, oauth2
+from .dataset import VIEWER
+
+pytestmark = pytest.mark.anyio
+
+
+def as_user(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {oauth2.create_access_token({'user_id': user_id})}"}
+
+
+async def inbox(client) -> list[dict]:
+    response = await client.get("/notifications/?limit=100")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def unread(client) -> int:
+    return (await client.get("/notifications/unread")).json()["unread"]
+
+
+@pytest.fixture
+async def own_post(client):
+    """A fresh post by the viewer, so no earlier notification exists for it."""
+    # Write out whatever earlier tests left buffered, so unread counts start settled
+    await notifications.flush()
+    response = await client.post("/posts/", json={"title": "notify me", "content": "votes please"})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def test_votes_coalesce_into_one_entry(client, own_post):
+    before = await unread(client)
+    for voter in (10, 11, 12, 13):
+        await client.post("/vote/", json={"post_id": own_post, "dir": 1}, headers=as_user(voter))
+    # Undone before the flush: never written
+    await client.post("/vote/", json={"post_id": own_post, "dir": 0}, headers=as_user(13))
+    # Your own vote does not notify you
+    await client.post("/vote/", json={"post_id": own_post, "dir": 1})
+    await notifications.flush()
+    await client.post("/vote/", json={"post_id": own_post, "dir": 1}, headers=as_user(14))
+    await notifications.flush()
+
+    entries = [n for n in await inbox(client) if n["kind"] == "vote" and n["target_id"] == own_post]
+    assert len(entries) == 1
+    assert entries[0]["actors_count"] == 4
+    assert entries[0]["actor"]["id"] == 14
+    assert not entries[0]["read"]
+    assert await unread(client) == min(before + 1, notifications.UNREAD_CAP)
+
+
+async def test_read_entries_stop_coalescing(client, own_post):
+    await client.post("/vote/", json={"post_id": own_post, "dir": 1}, headers=as_user(10))
+    await notifications.flush()
+    assert (await client.post("/notifications/read")).status_code == 204
+    assert await unread(client) == 0
+
+    await client.post("/vote/", json={"post_id": own_post, "dir": 1}, headers=as_user(11))
+    await notifications.flush()
+    entries = [n for n in await inbox(client) if n["kind"] == "vote" and n["target_id"] == own_post]
+    assert [(n["read"], n["actors_count"]) for n in entries] == [(False, 1), (True, 1)]
+    assert await unread(client) == 1
+
+    assert (await client.post(f"/notifications/{entries[0]['id']}/read")).status_code == 204
+    assert await unread(client) == 0
+
+
+async def test_comments_replies_and_follows(client, own_post):
+    await client.post("/notifications/read")
+    comment = (await client.post(f"/posts/{own_post}/comment", json={"comment": "nice"})).json()
+    await client.post(f"/posts/{own_post}/comment", json={"comment": "agreed"}, headers=as_user(20))
+    await client.post(f"/posts/{comment['id']}/reply", json={"comment": "thanks"}, headers=as_user(21))
+    await client.post(f"/posts/comments/{comment['id']}/like?dir=1", headers=as_user(22))
+    await client.post(f"/follow/users/user{VIEWER}/follow", headers=as_user(23))
+    await notifications.flush()
+
+    unread_entries = {(n["kind"], n["target_id"]): n for n in await inbox(client) if not n["read"]}
+    assert set(unread_entries) == {
+        ("comment", own_post), ("reply", comment["id"]), ("comment_like", comment["id"]), ("follow", VIEWER),
+    }
+    assert unread_entries[("reply", comment["id"])]["post_id"] == own_post
+    assert unread_entries[("follow", VIEWER)]["post_id"] is None
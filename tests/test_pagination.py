@@ -0,0 +1,76 @@
+"""Edge cases of the keyset-paginated listings."""
+import base64
+
+import pytest
+
+from app.routers import post as post_router, profile as profile_router
+from .dataset import AUTHOR, POST
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("path", [
+    "/posts/?Limit=0",
+    "/feed?Limit=0",
+    f"/profile/{AUTHOR}/posts?limit=0",
+    f"/profile/{AUTHOR}/followers?limit=0",
+    f"/posts/{POST}/comments/tree?limit=0",
+    f"/posts/{POST}/comments?limit=0",
+])
+async def test_empty_page(client, path):
+    response = await client.get(path)
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+
+async def test_comment_pages_are_bounded(client):
+    post_id = (await client.post("/posts/", json={"title": "busy thread", "content": "many comments"})).json()["id"]
+    roots = [(await client.post(f"/posts/{post_id}/comment", json={"comment": f"c{i}"})).json()["id"]
+             for i in range(post_router.MAX_COMMENT_PAGE + 1)]
+    for i in range(post_router.MAX_COMMENT_REPLIES + 1):
+        await client.post(f"/posts/{roots[0]}/reply", json={"comment": f"r{i}"})
+
+    detail = (await client.get(f"/posts/{post_id}")).json()
+    assert [c["id"] for c in detail["comments"]] == roots[:post_router.COMMENT_PAGE]
+    assert detail["comments_cursor"]
+    assert len(detail["comments"][0]["replies"]) == 3
+
+    response = await client.get(f"/posts/{post_id}/comments/tree?limit=1000&replies=1000")
+    tree = response.json()
+    assert len(tree) == post_router.MAX_COMMENT_PAGE
+    assert "X-Next-Cursor" in response.headers
+    assert len(tree[0]["replies"]) == post_router.MAX_COMMENT_REPLIES
+    assert tree[0]["replies_cursor"]
+
+    replies = (await client.get(f"/posts/comments/{roots[0]}/replies?cursor={tree[0]['replies_cursor']}")).json()
+    assert len(replies) == 1
+
+    seen, cursor = [], None
+    while True:
+        response = await client.get(f"/posts/{post_id}/comments?limit=1000" + (f"&cursor={cursor}" if cursor else ""))
+        page = response.json()
+        assert len(page) <= post_router.MAX_COMMENT_PAGE
+        seen += [c["id"] for c in page]
+        if not (cursor := response.headers.get("X-Next-Cursor")):
+            break
+    assert len(seen) == len(set(seen)) == len(roots) + post_router.MAX_COMMENT_REPLIES + 1
+
+
+@pytest.mark.parametrize("path", [f"/profile/{AUTHOR}/followers", f"/profile/{AUTHOR}/following"])
+async def test_follow_pages_are_bounded(client, monkeypatch, path):
+    monkeypatch.setattr(profile_router, "MAX_FOLLOW_PAGE", 3)
+    response = await client.get(f"{path}?limit=100000")
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+    assert "X-Next-Cursor" in response.headers
+
+
+@pytest.mark.parametrize("path", ["/posts/?Limit=5&Cursor=", "/posts/?Limit=5&Sort=hot&Cursor=", "/users/?limit=5&cursor="])
+@pytest.mark.parametrize("raw", [
+    '["2026-01-01T00:00:00+00:00",99999999999]', "[1.5,-99999999999]", "[99999999999]", '["x",1]', "[", "[]",
+])
+async def test_forged_cursor_is_rejected(client, path, raw):
+    response = await client.get(path + base64.urlsafe_b64encode(raw.encode()).decode())
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid cursor"
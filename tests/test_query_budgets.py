@@ -0,0 +1,57 @@
+"""Query budgets per endpoint.
+
+Each case makes one request with cold caches and fails if it sends more statements
+than its budget, or repeats one statement with different parameters (an N+1, usually a
+lazy-loaded relationship or a query inside a loop). Budgets are the current counts; if a
+change needs more queries, raise the number here in the same commit so the increase is
+reviewed.
+"""
+import pytest
+
+from app.models import models
+from app.utils.database import SessionLocal
+from .dataset import AUTHOR, COMMENT, POST, VIEWER
+
+pytestmark = pytest.mark.anyio
+
+# Authenticated requests include one statement to load the signed-in user
+BUDGETS = [
+    ("/posts/?Limit=20", 1),
+    ("/posts/?Limit=20&Sort=hot", 1),
+    ("/posts/?Limit=20&Sort=top&Window=week", 1),
+    ("/posts/?Limit=20&SearchMode=fulltext&Search=content", 1),
+    (f"/posts/{AUTHOR}/posts?limit=20", 1),
+    (f"/posts/{POST}", 4),
+    (f"/posts/{POST}/comments", 2),
+    (f"/posts/{POST}/comments/tree?limit=20&depth=3&replies=3", 3),
+    (f"/posts/comments/{COMMENT}/replies?limit=20", 3),
+    (f"/posts/{POST}/comments/likes", 1),
+    (f"/posts/comments/liked?ids={COMMENT}&ids={COMMENT + 1}", 2),
+    ("/feed?Limit=20", 2),
+    ("/profile/me", 2),
+    (f"/profile/{AUTHOR}", 3),
+    (f"/profile/{AUTHOR}/posts?limit=20", 1),
+    (f"/profile/{AUTHOR}/followers?limit=20", 3),
+    (f"/profile/{AUTHOR}/following?limit=20", 3),
+    ("/follow/suggestions?limit=10", 4),
+    (f"/follow/status?user_ids={AUTHOR}&user_ids={VIEWER + 10}", 2),
+    ("/users/?limit=50", 1),
+    ("/notifications/?limit=20", 2),
+    ("/notifications/unread", 2),
+]
+
+
+@pytest.mark.parametrize("path, budget", BUDGETS)
+async def test_endpoint_query_budget(client, query_budget, path, budget):
+    with query_budget(budget):
+        response = await client.get(path)
+    assert response.status_code == 200, response.text
+
+
+async def test_budget_flags_n_plus_one(seeded, query_budget):
+    """Loading rows one by one in a loop trips the N+1 check even within the budget."""
+    with pytest.raises(AssertionError, match="N\\+1"):
+        with query_budget(100):
+            async with SessionLocal() as db:
+                for post_id in range(1, 11):
+                    await db.get(models.Post, post_id)
@@ -0,0 +1,82 @@
+"""Query-plan regression suite for the hot read paths.
+
+Each case calls a real endpoint (or maintenance routine) on a seeded dataset, records
+the SQL the app actually sends, and EXPLAINs every statement with its parameters. The
+case fails if any plan reads one of the large tables with a sequential scan, which is
+what happens when an index such as ix_post_user_id_created_at is dropped or a query
+is rewritten into a shape the index can no longer serve.
+
+    python -m pytest tests/test_query_plans.py
+"""
+import json
+
+import pytest
+
+from app.utils import counters, database
+from .dataset import AUTHOR, COMMENT, POST
+
+pytestmark = pytest.mark.anyio
+
+# Tables that grow with usage; a sequential scan of any of them is a regression.
+# users is left out: plans may reasonably hash-join a page of rows against it.
+LARGE_TABLES = {"post", "comments", "votes", "comment_likes", "followers", "timeline", "notifications"}
+
+
+async def sequential_scans(statements) -> list[str]:
+    """EXPLAIN each recorded statement and name every large table it scans sequentially."""
+    found = []
+    async with database.engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        for sql, parameters in statements:
+            plan = await raw.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *(parameters or ()))
+            # SQLAlchemy registers a json codec on its asyncpg connections; plain asyncpg returns text
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            nodes = [plan[0]["Plan"]]
+            while nodes:
+                node = nodes.pop()
+                if node["Node Type"] == "Seq Scan" and node["Relation Name"] in LARGE_TABLES:
+                    found.append(f"Seq Scan on {node['Relation Name']} in:\n{sql}")
+                nodes.extend(node.get("Plans", []))
+    return found
+
+
+ENDPOINTS = [
+    "/posts/?Limit=20",
+    "/posts/?Limit=20&Sort=hot",
+    "/posts/?Limit=20&Sort=top&Window=day",
+    "/posts/?Limit=20&Sort=top&Window=week",
+    "/posts/?Limit=20&SearchMode=fulltext&Search=12345",
+    f"/posts/{AUTHOR}/posts?limit=20",
+    f"/profile/{AUTHOR}/posts?limit=20",
+    f"/profile/{AUTHOR}",
+    f"/profile/{AUTHOR}/followers?limit=20",
+    f"/profile/{AUTHOR}/following?limit=20",
+    f"/posts/{POST}",
+    f"/posts/{POST}/comments",
+    f"/posts/{POST}/comments/tree?limit=20&depth=3&replies=3",
+    f"/posts/comments/{COMMENT}/replies?limit=20",
+    f"/posts/{POST}/comments/likes",
+    f"/posts/comments/liked?ids={COMMENT}&ids={COMMENT + 1}",
+    "/feed?Limit=20",
+    "/notifications/?limit=20",
+    "/notifications/unread",
+]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+async def test_endpoint_uses_indexes(client, captured_statements, path):
+    with captured_statements() as statements:
+        response = await client.get(path)
+    assert response.status_code == 200, response.text
+    assert statements, "the endpoint sent no SQL"
+    assert not await sequential_scans(statements)
+
+
+async def test_targeted_reconcile_uses_indexes(seeded, captured_statements):
+    """The count subqueries behind counter repair, limited to a few rows."""
+    async with database.SessionLocal() as db:
+        with captured_statements() as statements:
+            await counters.reconcile(db, post_ids=[POST], user_ids=[AUTHOR], comment_ids=[COMMENT])
+        await db.rollback()
+    assert not await sequential_scans(statements)
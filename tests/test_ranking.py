@@ -0,0 +1,43 @@
+"""Stored hot scores and the background re-decay pass."""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.models import models
+from app.utils import ranking
+from app.utils.config import settings
+from app.utils.database import SessionLocal
+
+pytestmark = pytest.mark.anyio
+
+
+async def age(post_id: int, by: timedelta):
+    """Move a post back in time and give it a stale score, as if no pass had run since."""
+    async with SessionLocal() as db:
+        await db.execute(update(models.Post).where(models.Post.id == post_id)
+                         .values(created_at=func.now() - by, hot_score=999))
+        await db.commit()
+
+
+async def scores(post_id: int) -> tuple[float, float]:
+    """The stored score and the score the expression gives right now."""
+    async with SessionLocal() as db:
+        return (await db.execute(select(models.Post.hot_score, ranking.hot_score())
+                                 .where(models.Post.id == post_id))).one()
+
+
+async def test_redecay_rescores_only_the_window(client):
+    recent, old = [
+        (await client.post("/posts/", json={"title": "decaying", "content": "slowly"})).json()["id"]
+        for _ in range(2)
+    ]
+    await age(recent, timedelta(hours=10))
+    await age(old, timedelta(hours=settings.HOT_REDECAY_WINDOW_HOURS + 24))
+
+    assert await ranking.redecay() >= 1
+
+    stored, expected = await scores(recent)
+    assert stored == pytest.approx(expected, rel=1e-3)
+    assert stored < 999
+    assert (await scores(old))[0] == 999
@@ -0,0 +1,83 @@
+"""Read routing between the primary and read replicas.
+
+The test database stands in for the replica here (it is not in recovery, so it reports
+no lag); a real standby on a second local instance can be listed in
+DATABASE_REPLICA_HOSTS to try the same routing by hand.
+"""
+import time
+
+import pytest
+from sqlalchemy import event, text
+
+from app.utils import database, replicas
+from app.utils.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replica(seeded, monkeypatch):
+    """One replica in rotation, pointing at the test database, with a count of the statements it ran."""
+    replica = replicas.Replica("test", database.make_engine(database.SQLALCHEMY_DATABASE_URL), in_rotation=True)
+    replica.statements = 0
+
+    def record(*args):
+        replica.statements += 1
+
+    event.listen(replica.engine.sync_engine, "before_cursor_execute", record)
+    monkeypatch.setattr(replicas, "replicas", [replica])
+    yield replica
+    await replica.engine.dispose()
+
+
+async def test_reads_go_to_replica(client, replica):
+    response = await client.get("/posts/?Limit=20")
+    assert response.status_code == 200
+    assert replica.statements > 0
+
+
+async def test_recent_writer_reads_from_primary(client, replica):
+    client.cookies.set(replicas.PIN_COOKIE, str(time.time() + 5))
+    response = await client.get("/posts/?Limit=20")
+    assert response.status_code == 200
+    assert replica.statements == 0
+
+
+async def test_lagging_replica_leaves_rotation(client, replica, monkeypatch):
+    await replicas.check(replica)
+    assert replica.lag == 0 and replica.in_rotation
+    monkeypatch.setattr(settings, "REPLICA_MAX_LAG", -1)
+    await replicas.check(replica)
+    assert not replica.in_rotation
+    replica.statements = 0
+    await client.get("/posts/?Limit=20")
+    assert replica.statements == 0
+
+
+async def test_unreachable_replica_falls_back_to_primary(client, replica):
+    await replica.engine.dispose()
+    replica.engine = database.make_engine(database.database_url("127.0.0.1", "1"))
+    response = await client.get("/posts/?Limit=20")
+    assert response.status_code == 200
+    assert not replica.in_rotation
+
+
+async def test_recent_writer_skips_cached_replica_reads(client, replica, captured_statements):
+    await client.get("/posts/?Limit=20")
+    client.cookies.set(replicas.PIN_COOKIE, str(time.time() + 5))
+    with captured_statements() as statements:
+        response = await client.get("/posts/?Limit=20")
+    assert response.status_code == 200
+    assert statements, "answered from a cache entry the replica filled"
+
+
+async def test_disconnected_replica_leaves_rotation(client, replica, monkeypatch):
+    await replicas.check(replica)
+    assert replica.in_rotation
+    # What LAG_SQL reports for a standby whose WAL receiver stopped
+    monkeypatch.setattr(replicas, "LAG_SQL", text("SELECT CAST(NULL AS float8) WHERE :silence > 0"))
+    await replicas.check(replica)
+    assert replica.lag is None and not replica.in_rotation
+    replica.statements = 0
+    await client.get("/posts/?Limit=20")
+    assert replica.statements == 0
@@ -0,0 +1,47 @@
+"""The response cache of public listings: validators and what each write drops."""
+import pytest
+
+from app.utils import response_cache
+from .dataset import POST
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_matching_etag_gets_304(client):
+    first = await client.get("/posts/?Limit=5")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = await client.get("/posts/?Limit=5", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+    since = await client.get("/posts/?Limit=5", headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+
+    other = await client.get("/posts/?Limit=5", headers={"If-None-Match": '"stale"'})
+    assert other.status_code == 200
+    assert other.content == first.content
+
+
+async def test_writes_drop_only_what_they_change(client):
+    listing = (await client.get("/posts/?Limit=5")).json()
+    await client.get(f"/posts/{POST}/comments/tree?limit=5")
+    tree_key = f"/posts/{POST}/comments/tree?limit=5"
+
+    # A vote leaves the cached listing as it was, count included
+    voted = listing[0]["Post"]["id"]
+    await client.post("/vote/", json={"post_id": voted, "dir": 1})
+    assert (await client.get("/posts/?Limit=5")).json() == listing
+
+    # A comment drops its post's tree, nothing else
+    assert response_cache.responses.get(tree_key) is not None
+    await client.post(f"/posts/{POST}/comment", json={"comment": "fresh"})
+    assert response_cache.responses.get(tree_key) is None
+    assert response_cache.responses.get("/posts/?Limit=5") is not None
+
+    # A new post drops the listings
+    created = (await client.post("/posts/", json={"title": "cache buster", "content": "new"})).json()
+    assert (await client.get("/posts/?Limit=5")).json()[0]["Post"]["id"] == created["id"]
+    await client.post("/vote/", json={"post_id": voted, "dir": 0})
@@ -0,0 +1,54 @@
+"""Fulltext search on GET /posts/: relevance order and keyset paging."""
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def term() -> str:
+    """A word no other post contains, so each test sees only the posts it wrote."""
+    return f"quoxel{uuid.uuid4().hex[:8]}"
+
+
+async def publish(client, title: str, content: str) -> int:
+    response = await client.post("/posts/", json={"title": title, "content": content})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def search(client, term: str, limit: int = 50, cursor: str = "") -> tuple[list[int], str | None]:
+    response = await client.get(f"/posts/?SearchMode=fulltext&Search={term}&Limit={limit}&Cursor={cursor}")
+    assert response.status_code == 200, response.text
+    return [row["Post"]["id"] for row in response.json()], response.headers.get("X-Next-Cursor")
+
+
+async def test_title_matches_rank_above_content_matches(client, term):
+    in_content = await publish(client, "nothing to see", f"the body mentions {term} once")
+    in_both = await publish(client, f"all about {term}", f"and the body says {term} again")
+    in_title = await publish(client, f"a title with {term}", "a body without it")
+    await publish(client, "unrelated", "no match here")
+
+    ids, cursor = await search(client, term)
+    assert ids == [in_both, in_title, in_content]
+    assert cursor is None
+
+
+async def test_cursor_pages_follow_the_single_page_order(client, term):
+    # Equal ranks are common in practice; the id tiebreak has to keep them in order across pages
+    for n in range(3):
+        await publish(client, f"{term} number {n}", "body")
+    for n in range(4):
+        await publish(client, "plain", f"{term} in the body, post {n}")
+
+    everything, _ = await search(client, term)
+    assert len(everything) == 7
+
+    paged, cursor = [], ""
+    while True:
+        ids, cursor = await search(client, term, limit=2, cursor=cursor)
+        paged += ids
+        if cursor is None:
+            break
+    assert paged == everything
@@ -0,0 +1,86 @@
+"""The fan-out-on-write home timeline behind /feed."""
+import itertools
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from app.models import models
+from app.utils import oauth2
+from app.utils.config import settings
+from app.utils.database import SessionLocal
+
+pytestmark = pytest.mark.anyio
+
+_pairs = itertools.count()
+
+
+def as_user(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {oauth2.create_access_token({'user_id': user_id})}"}
+
+
+@pytest.fixture
+async def pair(seeded):
+    """A fresh reader and author, with no follows and no posts: (reader_id, author_id, author_user_name)."""
+    n = next(_pairs)
+    names = [f"timeline_reader{n}", f"timeline_author{n}"]
+    async with SessionLocal() as db:
+        ids = (await db.scalars(
+            insert(models.User).returning(models.User.id),
+            [{"name": name, "user_name": name, "email": f"{name}@example.com", "password": "not-a-hash"}
+             for name in names],
+        )).all()
+        await db.commit()
+    return ids[0], ids[1], names[1]
+
+
+async def feed_ids(client, reader: int) -> list[int]:
+    response = await client.get("/feed?Limit=50", headers=as_user(reader))
+    assert response.status_code == 200, response.text
+    return [row["Post"]["id"] for row in response.json()]
+
+
+async def timeline_rows(reader: int) -> int:
+    async with SessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(models.Timeline).where(models.Timeline.user_id == reader))
+
+
+async def publish(client, author: int, title: str) -> int:
+    response = await client.post("/posts/", json={"title": title, "content": "for the feed"}, headers=as_user(author))
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def test_follow_backfills_and_new_posts_fan_out(client, pair):
+    reader, author, author_name = pair
+    earlier = [await publish(client, author, f"before {n}") for n in range(3)]
+    assert await feed_ids(client, reader) == []
+
+    await client.post(f"/follow/users/{author_name}/follow", headers=as_user(reader))
+    assert await feed_ids(client, reader) == earlier[::-1]
+
+    later = await publish(client, author, "after")
+    assert await feed_ids(client, reader) == [later, *earlier[::-1]]
+    assert await timeline_rows(reader) == 4
+
+    await client.delete(f"/follow/users/{author}/follow", headers=as_user(reader))
+    assert await feed_ids(client, reader) == []
+    assert await timeline_rows(reader) == 0
+
+
+async def test_celebrity_posts_are_merged_at_read(client, pair):
+    reader, author, author_name = pair
+    async with SessionLocal() as db:
+        await db.execute(update(models.User).where(models.User.id == author)
+                         .values(followers_count=settings.FEED_FANOUT_THRESHOLD))
+        await db.commit()
+    earlier = await publish(client, author, "before")
+    await client.post(f"/follow/users/{author_name}/follow", headers=as_user(reader))
+    later = await publish(client, author, "after")
+
+    assert await timeline_rows(reader) == 0
+    assert await feed_ids(client, reader) == [later, earlier]
+
+    page = await client.get("/feed?Limit=1", headers=as_user(reader))
+    assert [row["Post"]["id"] for row in page.json()] == [later]
+    rest = await client.get(f"/feed?Limit=1&Cursor={page.headers['X-Next-Cursor']}", headers=as_user(reader))
+    assert [row["Post"]["id"] for row in rest.json()] == [earlier]